@@ -1,7 +1,7 @@
 """
 数据库模型 - 协作对话相关
 """
-from sqlalchemy import Column, String, Text, DateTime, Integer, JSON, ForeignKey, Boolean
+from sqlalchemy import Column, String, Text, DateTime, Integer, JSON, ForeignKey, Boolean, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -80,4 +80,9 @@ class BlockchainEvent(Base):
     event_data = Column(JSON, nullable=False)          # 事件数据
     data = Column(Text, nullable=True)                  # Additional data field for learning events
     timestamp = Column(DateTime, default=datetime.utcnow)
-    processed = Column(Boolean, default=False)         # 是否已处理
\ No newline at end of file
+    processed = Column(Boolean, default=False)         # 是否已处理
+
+
+# 按agent取最近学习事件、按任务取某类事件的查询索引
+Index('idx_events_agent_ts', BlockchainEvent.agent_id, BlockchainEvent.timestamp.desc())
+Index('idx_events_task_type', BlockchainEvent.task_id, BlockchainEvent.event_type)
@@ -16,7 +16,6 @@ import requests
 import json
 import time
 import sys
-from datetime import datetime, timedelta
 
 # 配置
 BACKEND_URL = "http://localhost:8001"
@@ -34,17 +33,29 @@ class Colors:
     BOLD = '\033[1m'
     UNDERLINE = '\033[4m'
 
+# 各状态带颜色的前缀只在加载时拼接一次，print_status直接查表
+STATUS_PREFIXES = {
+    "INFO": f"{Colors.OKBLUE}[INFO]{Colors.ENDC}",
+    "SUCCESS": f"{Colors.OKGREEN}[SUCCESS]{Colors.ENDC}",
+    "ERROR": f"{Colors.FAIL}[ERROR]{Colors.ENDC}",
+    "WARNING": f"{Colors.WARNING}[WARNING]{Colors.ENDC}",
+}
+
+def format_status(message, status="INFO"):
+    """格式化带颜色的状态信息"""
+    prefix = STATUS_PREFIXES.get(status)
+    if prefix is None:
+        prefix = f"{Colors.OKBLUE}[{status}]{Colors.ENDC}"
+    
+    return f"{prefix} {message}"
+
 def print_status(message, status="INFO"):
     """打印带颜色的状态信息"""
-    color = Colors.OKBLUE
-    if status == "SUCCESS":
-        color = Colors.OKGREEN
-    elif status == "ERROR":
-        color = Colors.FAIL
-    elif status == "WARNING":
-        color = Colors.WARNING
-    
-    print(f"{color}[{status}]{Colors.ENDC} {message}")
+    print(format_status(message, status))
+
+def print_statuses(entries):
+    """把多条(message, status)状态信息拼接后一次写出"""
+    sys.stdout.write("".join(format_status(message, status) + "\n" for message, status in entries))
 
 def check_backend_health():
     """检查后端服务是否健康"""
@@ -55,9 +66,11 @@ def check_backend_health():
             if health_data.get("status") == "healthy":
                 print_status("后端服务健康检查通过", "SUCCESS")
                 blockchain_details = health_data.get("blockchain_details", {})
-                print_status(f"区块链连接: {blockchain_details.get('connected', False)}", "INFO")
-                print_status(f"网络ID: {blockchain_details.get('network_id', 'Unknown')}", "INFO")
-                print_status(f"最新区块: {blockchain_details.get('latest_block', 'Unknown')}", "INFO")
+                print_statuses([
+                    (f"区块链连接: {blockchain_details.get('connected', False)}", "INFO"),
+                    (f"网络ID: {blockchain_details.get('network_id', 'Unknown')}", "INFO"),
+                    (f"最新区块: {blockchain_details.get('latest_block', 'Unknown')}", "INFO"),
+                ])
                 return True
             else:
                 print_status("后端服务状态异常", "ERROR")
@@ -84,9 +97,11 @@ def register_agent(agent_data):
             if result.get("success"):
                 agent_id = result.get("agent_id")
                 tx_hash = result.get("transaction_hash")
-                print_status(f"✅ Agent '{agent_data['name']}' 注册成功", "SUCCESS")
-                print_status(f"   Agent ID: {agent_id}", "INFO")
-                print_status(f"   交易哈希: {tx_hash}", "INFO")
+                print_statuses([
+                    (f"✅ Agent '{agent_data['name']}' 注册成功", "SUCCESS"),
+                    (f"   Agent ID: {agent_id}", "INFO"),
+                    (f"   交易哈希: {tx_hash}", "INFO"),
+                ])
                 return True
             else:
                 print_status(f"❌ Agent '{agent_data['name']}' 注册失败: {result.get('error', 'Unknown error')}", "ERROR")
@@ -114,10 +129,12 @@ def create_task(task_data):
                 task_id = result.get("task", {}).get("task_id")
                 tx_hash = result.get("transaction_hash")
                 reward = result.get("task", {}).get("reward")
-                print_status(f"✅ Task '{task_data['title']}' 创建成功", "SUCCESS")
-                print_status(f"   Task ID: {task_id}", "INFO")
-                print_status(f"   奖励: {reward} ETH", "INFO")
-                print_status(f"   交易哈希: {tx_hash}", "INFO")
+                print_statuses([
+                    (f"✅ Task '{task_data['title']}' 创建成功", "SUCCESS"),
+                    (f"   Task ID: {task_id}", "INFO"),
+                    (f"   奖励: {reward} ETH", "INFO"),
+                    (f"   交易哈希: {tx_hash}", "INFO"),
+                ])
                 return True
             else:
                 print_status(f"❌ Task '{task_data['title']}' 创建失败: {result.get('error', 'Unknown error')}", "ERROR")
@@ -129,10 +146,13 @@ def create_task(task_data):
         print_status(f"❌ Task '{task_data['title']}' 创建失败: {str(e)}", "ERROR")
         return False
 
-def get_future_timestamp(days_from_now):
-    """获取未来时间戳"""
-    future_date = datetime.now() + timedelta(days=days_from_now)
-    return int(future_date.timestamp())
+SECONDS_PER_DAY = 24 * 3600
+
+def get_future_timestamp(days_from_now, now=None):
+    """获取未来时间戳，now为基准时间（秒），批量计算时传入同一个值"""
+    if now is None:
+        now = time.time()
+    return int(now + days_from_now * SECONDS_PER_DAY)
 
 def register_all_agents():
     """注册所有预定义的agents"""
@@ -220,6 +240,9 @@ def create_all_tasks():
     print_status("开始创建Tasks", "INFO")
     print_status("=" * 50, "INFO")
     
+    # 所有任务的截止时间基于同一个当前时间计算
+    now = time.time()
+    
     # 使用与前端兼容的capabilities创建任务
     # 前端定义：['data_analysis', 'text_generation', 'classification', 'translation', 'summarization', 'image_recognition', 'sentiment_analysis', 'code_generation']
     tasks = [
@@ -229,7 +252,7 @@ def create_all_tasks():
             "required_capabilities": ["data_analysis", "classification"],  # 使用前端定义的capabilities
             "min_reputation": 80,
             "reward": 1.2,
-            "deadline": get_future_timestamp(7)  # 7天后
+            "deadline": get_future_timestamp(7, now)  # 7天后
         },
         {
             "title": "Build REST API Documentation",
@@ -237,7 +260,7 @@ def create_all_tasks():
             "required_capabilities": ["code_generation", "text_generation"],  # 使用前端定义的capabilities
             "min_reputation": 85,
             "reward": 2.5,
-            "deadline": get_future_timestamp(14)  # 14天后
+            "deadline": get_future_timestamp(14, now)  # 14天后
         },
         {
             "title": "Sentiment Analysis of Customer Reviews",
@@ -245,7 +268,7 @@ def create_all_tasks():
             "required_capabilities": ["sentiment_analysis", "summarization"],  # 使用前端定义的capabilities
             "min_reputation": 85,
             "reward": 1.8,
-            "deadline": get_future_timestamp(10)  # 10天后
+            "deadline": get_future_timestamp(10, now)  # 10天后
         },
         {
             "title": "Multi-language Translation Service",
@@ -253,7 +276,7 @@ def create_all_tasks():
             "required_capabilities": ["translation", "text_generation"],  # 使用前端定义的capabilities
             "min_reputation": 85,
             "reward": 2.2,
-            "deadline": get_future_timestamp(12)  # 12天后
+            "deadline": get_future_timestamp(12, now)  # 12天后
         },
         {
             "title": "Image Classification and Analysis",
@@ -261,7 +284,7 @@ def create_all_tasks():
             "required_capabilities": ["image_recognition", "classification", "text_generation"],  # 使用前端定义的capabilities
             "min_reputation": 80,
             "reward": 2.8,
-            "deadline": get_future_timestamp(15)  # 15天后
+            "deadline": get_future_timestamp(15, now)  # 15天后
         },
         {
             "title": "Complete Content Generation Pipeline",
@@ -269,7 +292,7 @@ def create_all_tasks():
             "required_capabilities": ["data_analysis", "text_generation", "translation", "sentiment_analysis", "summarization"],  # 多agent协作任务
             "min_reputation": 80,
             "reward": 5.0,
-            "deadline": get_future_timestamp(30)  # 30天后 (多agent协作任务，时间更长)
+            "deadline": get_future_timestamp(30, now)  # 30天后 (多agent协作任务，时间更长)
         },
         {
             "title": "AI Content Quality Assessment",
@@ -277,7 +300,7 @@ def create_all_tasks():
             "required_capabilities": ["classification", "sentiment_analysis", "summarization"],  # 质量评估任务
             "min_reputation": 85,
             "reward": 3.2,
-            "deadline": get_future_timestamp(18)  # 18天后
+            "deadline": get_future_timestamp(18, now)  # 18天后
         }
     ]
     
@@ -28,11 +28,21 @@ from .contract_service import record_collaboration_ipfs, get_collaboration_recor
 
 logger = logging.getLogger(__name__)
 
+# Upper bound for a single agent's LLM call, so one slow agent cannot stall the collaboration
+AGENT_CALL_TIMEOUT = float(os.environ.get('AGENT_CALL_TIMEOUT', '120'))
+
 class AgentCollaborationService:
     """Service for managing agent collaborations and interactions"""
     
-    def __init__(self):
-        """Initialize the agent collaboration service"""
+    def __init__(self, mock_mode: Optional[bool] = None):
+        """
+        Initialize the agent collaboration service
+        
+        Args:
+            mock_mode: True强制使用模拟对话，不创建LLM客户端也不发起API请求；
+                       None时根据环境变量和API密钥自动决定
+        """
+        self.force_mock = bool(mock_mode)
         # 设置OpenAI API密钥
         self.api_key = os.environ.get('OPENAI_API_KEY', '')
         if not self.api_key:
@@ -59,7 +69,12 @@ class AgentCollaborationService:
             logger.info(f"Default model: {self.default_model}")
         
         # 设置OpenAI和DeepSeek客户端
-        if self.api_key and OPENAI_AVAILABLE and 'AsyncOpenAI' in globals():
+        if self.force_mock:
+            self.mock_mode = True
+            self.openai_client = None
+            self.deepseek_client = None
+            logger.info("Mock mode forced by caller. LLM clients not initialized.")
+        elif self.api_key and OPENAI_AVAILABLE and 'AsyncOpenAI' in globals():
             try:
                 # 初始化OpenAI客户端
                 self.openai_client = AsyncOpenAI(api_key=self.api_key)
@@ -80,6 +95,24 @@ class AgentCollaborationService:
             self.openai_client = None
             self.deepseek_client = None
     
+    async def warmup(self) -> bool:
+        """
+        预热LLM客户端：请求一次模型列表，提前完成连接建立和TLS握手，
+        第一次协作调用不再承担冷启动开销
+        
+        Returns:
+            bool: 是否完成预热（模拟模式或没有客户端时返回False）
+        """
+        if self.force_mock or not self.openai_client:
+            return False
+        
+        try:
+            await asyncio.wait_for(self.openai_client.models.list(), timeout=AGENT_CALL_TIMEOUT)
+            return True
+        except Exception as e:
+            logger.warning(f"LLM client warmup failed: {e}")
+            return False
+    
     async def create_collaboration(self, task_id: str, task_data: Dict) -> str:
         """
         创建一个新的代理协作任务
@@ -183,7 +216,7 @@ class AgentCollaborationService:
             logger.info(f"🔥 FORCE USING REAL OPENAI API - Mock mode check: self.mock_mode={self.mock_mode}, openai_client={self.openai_client is not None}")
             
             # 强制初始化OpenAI和DeepSeek客户端（如果未初始化）
-            if (not self.openai_client or not hasattr(self, 'deepseek_client') or not self.deepseek_client) and self.api_key:
+            if (not self.openai_client or not hasattr(self, 'deepseek_client') or not self.deepseek_client) and self.api_key and not self.force_mock:
                 try:
                     from openai import AsyncOpenAI
                     
@@ -206,7 +239,12 @@ class AgentCollaborationService:
             has_openai_client = self.openai_client is not None
             has_deepseek_client = hasattr(self, 'deepseek_client') and self.deepseek_client is not None
             
-            if (has_openai_client or has_deepseek_client) and self.api_key:
+            if self.force_mock:
+                # 调用方显式要求mock模式，不是错误
+                logger.info("🧪 Mock mode forced by caller, generating mock conversation")
+                conversation = self._generate_mock_conversation(task_data, agents_info, conversation)
+                collaboration_state = {"agent_responses": []}
+            elif (has_openai_client or has_deepseek_client) and self.api_key:
                 # 使用真实API（OpenAI或DeepSeek）
                 logger.info(f"🚀 Using real API! OpenAI available: {has_openai_client}, DeepSeek available: {has_deepseek_client}")
                 conversation, collaboration_state = await self._generate_real_conversation(task_data, agents_info, conversation)
@@ -610,6 +648,8 @@ When the task is completed, clearly indicate "Task Completed" and provide the fi
             logger.info(f"🤝 Starting collaboration with {num_agents} agents: {[agent['name'] for agent in agents_info]}")
             
             # Phase 1: Initial contributions from ALL agents
+            # Initial contributions are independent of each other, so all agents
+            # are called concurrently; results are applied in agent order.
             logger.info("📝 Phase 1: Initial contributions from all agents")
             for i, agent in enumerate(agents_info):
                 try:
@@ -622,42 +662,15 @@ When the task is completed, clearly indicate "Task Completed" and provide the fi
                     logger.error(f"❌ Error extracting agent {i} data: {e}")
                     logger.error(f"❌ Agent object: {agent}")
                     raise
-                
-                # Create context-aware agent prompt for initial contribution
-                agent_prompt = f"""You are {agent_name}, specializing in {', '.join(agent_caps)}.
-You are collaborating with {num_agents-1} other agents to complete this task:
-
-Task: {task_data.get('title', '')}
-Description: {task_data.get('description', '')}
-
-Other agents in this collaboration: {[a['name'] for a in agents_info if a['name'] != agent_name]}
-
-As the expert in {', '.join(agent_caps)}, please provide your initial analysis and contribution to this task. Focus on:
-1. How your expertise applies to this specific task
-2. Your proposed approach or solution from your domain perspective
-3. Key considerations or challenges you foresee
-4. What you'll need from other agents to succeed
-
-This is your initial contribution - be specific and actionable.
-"""
-                
-                # Get agent response
-                agent_conversation = conversation.copy()
-                agent_conversation.append({
-                    "role": "user", 
-                    "content": agent_prompt
-                })
-                
-                try:
-                    logger.info(f"🔄 Calling OpenAI API for agent {agent_name}...")
-                    response = await self._call_openai_api(agent_conversation)
-                    logger.info(f"✅ Agent {agent_name} provided initial contribution")
-                except Exception as e:
-                    logger.error(f"❌ Agent {agent_name} failed to respond: {str(e)}")
-                    logger.error(f"❌ Error details: {type(e).__name__}: {e}")
-                    import traceback
-                    logger.error(f"❌ Traceback: {traceback.format_exc()}")
-                    response = f"[Agent {agent_name} encountered an error and could not contribute. This agent will be penalized.]"
+            
+            base_conversation = conversation.copy()
+            responses = await asyncio.gather(*[
+                self._get_initial_contribution(agent, task_data, agents_info, base_conversation)
+                for agent in agents_info
+            ])
+            
+            for agent, response in zip(agents_info, responses):
+                agent_name = agent["name"]
                 
                 # Format and add response
                 formatted_response = f"**{agent_name}** (Initial Contribution): {response}"
@@ -669,13 +682,11 @@ This is your initial contribution - be specific and actionable.
                 # Update collaboration state
                 collaboration_state["agent_responses"].append({
                     "agent": agent_name,
-                    "agent_id": agent_id,
+                    "agent_id": agent["agent_id"],
                     "phase": "initial",
                     "response": response,
                     "success": "error" not in response.lower()
                 })
-                
-                await asyncio.sleep(0.3)  # Brief pause between agents
             
             # Phase 2: Collaborative refinement - ALL agents build on each other's work
             logger.info("🔄 Phase 2: Collaborative refinement from all agents")
@@ -772,6 +783,54 @@ Ensure the final result is complete, coherent, and actionable.
             mock_conversation = self._generate_mock_conversation(task_data, agents_info, conversation)
             return mock_conversation, {"agent_responses": []}
     
+    async def _get_initial_contribution(self, agent: Dict, task_data: Dict, agents_info: List[Dict],
+                                        conversation: List[Dict]) -> str:
+        """
+        Get one agent's Phase 1 contribution; failures and timeouts become a penalty message
+        """
+        agent_name = agent["name"]
+        agent_caps = agent["capabilities"]
+        num_agents = len(agents_info)
+        
+        # Create context-aware agent prompt for initial contribution
+        agent_prompt = f"""You are {agent_name}, specializing in {', '.join(agent_caps)}.
+You are collaborating with {num_agents-1} other agents to complete this task:
+
+Task: {task_data.get('title', '')}
+Description: {task_data.get('description', '')}
+
+Other agents in this collaboration: {[a['name'] for a in agents_info if a['name'] != agent_name]}
+
+As the expert in {', '.join(agent_caps)}, please provide your initial analysis and contribution to this task. Focus on:
+1. How your expertise applies to this specific task
+2. Your proposed approach or solution from your domain perspective
+3. Key considerations or challenges you foresee
+4. What you'll need from other agents to succeed
+
+This is your initial contribution - be specific and actionable.
+"""
+        
+        # Get agent response
+        agent_conversation = conversation.copy()
+        agent_conversation.append({
+            "role": "user", 
+            "content": agent_prompt
+        })
+        
+        try:
+            logger.info(f"🔄 Calling OpenAI API for agent {agent_name}...")
+            response = await asyncio.wait_for(
+                self._call_openai_api(agent_conversation),
+                timeout=AGENT_CALL_TIMEOUT
+            )
+            logger.info(f"✅ Agent {agent_name} provided initial contribution")
+        except Exception as e:
+            logger.error(f"❌ Agent {agent_name} failed to respond: {type(e).__name__}: {e}")
+            logger.exception(f"❌ Traceback for agent {agent_name}")
+            response = f"[Agent {agent_name} encountered an error and could not contribute. This agent will be penalized.]"
+        
+        return response
+    
     def _build_collaboration_context(self, collaboration_state: Dict, agents_info: List[Dict], round_num: int) -> str:
         """Build context for better agent collaboration"""
         context = ""
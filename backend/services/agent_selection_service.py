@@ -17,6 +17,9 @@ REPUTATION_WEIGHT = 0.25       # 声誉权重
 WORKLOAD_WEIGHT = 0.15         # 工作负载权重
 HISTORY_WEIGHT = 0.2           # 历史表现权重
 
+# 权重向量，顺序与score_components返回的分项一致
+SCORE_WEIGHTS = np.array([CAPABILITY_MATCH_WEIGHT, REPUTATION_WEIGHT, WORKLOAD_WEIGHT, HISTORY_WEIGHT])
+
 # 最大工作负载（用于归一化）
 MAX_WORKLOAD = 10
 
@@ -109,39 +112,67 @@ class AgentSelectionService:
         return (completion_factor * 0.4) + (average_score * 0.6)
     
     @staticmethod
-    def score_agent(agent: Dict[str, Any], task: Dict[str, Any]) -> float:
+    def score_components(agent: Dict[str, Any], task: Dict[str, Any]) -> Tuple[float, float, float, float]:
         """
-        综合评分代理对特定任务的适合度
+        计算代理各项评分（能力匹配、声誉、工作负载、历史表现）
         
         Args:
             agent: 代理信息
             task: 任务信息
             
         Returns:
-            float: 综合评分 (0-1)
+            Tuple: 各项分数 (0-1)，能力不匹配时全部为0
         """
-        # 计算各项分数
         capability_score = AgentSelectionService.calculate_capability_match_score(agent, task)
         
-        # 如果能力不匹配，直接返回0分
+        # 如果能力不匹配，总分直接为0
         if capability_score == 0:
-            return 0.0
+            return (0.0, 0.0, 0.0, 0.0)
             
         reputation_score = agent.get("reputation", 0) / 100.0  # 归一化到0-1
         workload_score = AgentSelectionService.calculate_workload_score(agent)
         history_score = AgentSelectionService.calculate_history_score(agent)
         
+        return (capability_score, reputation_score, workload_score, history_score)
+    
+    @staticmethod
+    def score_agents(agents: List[Dict[str, Any]], task: Dict[str, Any]) -> np.ndarray:
+        """
+        批量计算多个代理对特定任务的综合评分
+        
+        Args:
+            agents: 代理列表
+            task: 任务信息
+            
+        Returns:
+            np.ndarray: 每个代理的综合评分 (0-1)，顺序与agents一致
+        """
+        if not agents:
+            return np.zeros(0)
+        
+        # 分项分数组成矩阵，一次矩阵乘法得到所有代理的加权总分
+        components = np.array([AgentSelectionService.score_components(agent, task) for agent in agents])
+        return components @ SCORE_WEIGHTS
+    
+    @staticmethod
+    def score_agent(agent: Dict[str, Any], task: Dict[str, Any]) -> float:
+        """
+        综合评分代理对特定任务的适合度
+        
+        Args:
+            agent: 代理信息
+            task: 任务信息
+            
+        Returns:
+            float: 综合评分 (0-1)
+        """
+        components = AgentSelectionService.score_components(agent, task)
+        
         # 加权计算总分
-        total_score = (
-            capability_score * CAPABILITY_MATCH_WEIGHT +
-            reputation_score * REPUTATION_WEIGHT +
-            workload_score * WORKLOAD_WEIGHT +
-            history_score * HISTORY_WEIGHT
-        )
+        total_score = float(np.dot(components, SCORE_WEIGHTS))
         
         logger.debug(f"Agent {agent.get('name')} scored {total_score:.4f} for task {task.get('title')}")
-        logger.debug(f"  Capability: {capability_score:.4f}, Reputation: {reputation_score:.4f}, " +
-                    f"Workload: {workload_score:.4f}, History: {history_score:.4f}")
+        logger.debug("  Capability: %.4f, Reputation: %.4f, Workload: %.4f, History: %.4f", *components)
         
         return total_score
     
@@ -168,9 +199,9 @@ class AgentSelectionService:
             logger.warning(f"No qualified agents found for task {task.get('task_id')}")
             return None
         
-        # 为每个代理评分
-        for agent in qualified_agents:
-            agent["score"] = AgentSelectionService.score_agent(agent, task)
+        # 为所有代理批量评分
+        for agent, score in zip(qualified_agents, AgentSelectionService.score_agents(qualified_agents, task)):
+            agent["score"] = float(score)
         
         # 选择得分最高的代理
         best_agent = max(qualified_agents, key=lambda a: a["score"])
@@ -201,9 +232,9 @@ class AgentSelectionService:
         if not qualified_agents:
             logger.warning(f"No qualified agents found for task {task.get('task_id')}")
             return []
-        # 为每个代理评分
-        for agent in qualified_agents:
-            agent["score"] = AgentSelectionService.score_agent(agent, task)
+        # 为所有代理批量评分
+        for agent, score in zip(qualified_agents, AgentSelectionService.score_agents(qualified_agents, task)):
+            agent["score"] = float(score)
         # 按得分降序排序
         sorted_agents = sorted(qualified_agents, key=lambda a: a["score"], reverse=True)
         # 动态分配：优先覆盖所有 required_capabilities
@@ -1,9 +1,13 @@
 """
 协作对话数据库服务
 """
+import copy
 import logging
-from typing import List, Dict, Any, Optional
-from sqlalchemy import create_engine, desc
+import time
+import uuid
+from collections import defaultdict
+from typing import Iterator, List, Dict, Any, Optional
+from sqlalchemy import create_engine, desc, insert
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.exc import SQLAlchemyError
 from datetime import datetime
@@ -11,24 +15,43 @@ import json
 
 from models.collaboration import Base, Conversation, ConversationMessage, CollaborationResult, BlockchainEvent
 
+# get_blockchain_events结果的缓存有效期（秒）
+EVENTS_CACHE_TTL = 2.0
+
+# 批量插入时每行都补齐的列（未提供的填None），保证executemany各行键集一致
+BULK_EVENT_COLUMNS = ("event_id", "event_type", "agent_id", "task_id", "conversation_id",
+                      "transaction_hash", "block_number", "event_data", "data")
+
 # 配置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # 数据库配置
 DATABASE_URL = "sqlite:///./collaboration.db"  # 使用SQLite作为示例
-engine = create_engine(DATABASE_URL, echo=False)
+# 引擎在模块级只创建一次，连接由连接池复用；允许池中的连接跨线程使用
+# （后台任务线程和请求线程共用同一个服务实例）
+engine = create_engine(
+    DATABASE_URL,
+    echo=False,
+    connect_args={"check_same_thread": False}
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 # 创建表
 Base.metadata.create_all(bind=engine)
 
+# create_all不会给已存在的表补建索引，单独检查创建
+for index in BlockchainEvent.__table__.indexes:
+    index.create(bind=engine, checkfirst=True)
+
 class CollaborationDBService:
     """协作对话数据库服务类"""
     
     def __init__(self):
         self.engine = engine
         self.SessionLocal = SessionLocal
+        # (event_type, limit, offset, task_id) -> (写入时间, 事件列表)
+        self._events_cache: Dict[tuple, tuple] = {}
     
     def get_db(self) -> Session:
         """获取数据库会话"""
@@ -39,6 +62,21 @@ class CollaborationDBService:
             db.close()
             raise
     
+    def _invalidate_events_cache(self, task_ids=None):
+        """
+        使get_blockchain_events的缓存失效
+        
+        Args:
+            task_ids: 发生写入的任务ID集合；不按任务过滤的查询总是失效，
+                      为None时清空全部缓存
+        """
+        if task_ids is None:
+            self._events_cache.clear()
+            return
+        for key in list(self._events_cache):
+            if key[3] is None or key[3] in task_ids:
+                self._events_cache.pop(key, None)
+    
     def create_conversation(self, conversation_id: str, task_id: str, task_description: str, 
                           participants: List[str], agent_roles: Dict) -> Conversation:
         """
@@ -300,6 +338,7 @@ class CollaborationDBService:
             db.add(event)
             db.commit()
             db.refresh(event)
+            self._invalidate_events_cache({task_id})
             
             logger.info(f"Recorded blockchain event: {event_type} for task {task_id}")
             return event
@@ -311,6 +350,50 @@ class CollaborationDBService:
         finally:
             db.close()
     
+    def record_blockchain_events_bulk(self, events: List[Dict[str, Any]]) -> int:
+        """
+        批量记录区块链事件，所有事件在同一个事务中插入并只提交一次
+        
+        Args:
+            events: 事件列表，每项的键与record_blockchain_event的参数相同
+                    （event_type, task_id, event_data, conversation_id,
+                    transaction_hash, block_number），也可带event_id/agent_id/data；
+                    各项可以只提供部分键
+            
+        Returns:
+            count: 插入的事件数量
+        """
+        if not events:
+            return 0
+        
+        db = self.get_db()
+        try:
+            # 每行补齐为完整的列集合：executemany按第一行的键绑定参数，
+            # 键集不一致的行会报错或绑定错位
+            now = datetime.utcnow()
+            rows = []
+            for event in events:
+                row = {column: event.get(column) for column in BULK_EVENT_COLUMNS}
+                row["id"] = event.get("id") or str(uuid.uuid4())
+                row["timestamp"] = event.get("timestamp") or now
+                row["processed"] = event.get("processed", False)
+                rows.append(row)
+            
+            # 一次executemany插入全部行，只做一次commit（SQLite只fsync一次）
+            db.execute(insert(BlockchainEvent), rows)
+            db.commit()
+            self._invalidate_events_cache({event.get("task_id") for event in events})
+            
+            logger.info(f"Recorded {len(events)} blockchain events in one transaction")
+            return len(events)
+            
+        except SQLAlchemyError as e:
+            db.rollback()
+            logger.error(f"Error recording blockchain events: {e}")
+            raise
+        finally:
+            db.close()
+    
     def get_conversation_with_details(self, conversation_id: str) -> Dict:
         """
         获取对话的完整信息（包括消息和结果）
@@ -410,6 +493,7 @@ class CollaborationDBService:
             
             db.add(blockchain_event)
             db.commit()
+            self._invalidate_events_cache({learning_event.get("task_id")})
             db.refresh(blockchain_event)
             
             logger.info(f"Created learning event record: {learning_event['event_id']}")
@@ -482,6 +566,7 @@ class CollaborationDBService:
             ).delete()
             
             db.commit()
+            self._invalidate_events_cache({task_id})
             logger.info(f"🗑️ Deleted {deleted_count} blockchain events for task {task_id}")
             return deleted_count
             
@@ -506,6 +591,13 @@ class CollaborationDBService:
         Returns:
             事件数据列表
         """
+        # 短时间内相同参数的重复查询直接使用缓存，写入事件时对应的缓存会失效
+        cache_key = (event_type, limit, offset, task_id)
+        cached = self._events_cache.get(cache_key)
+        if cached and time.monotonic() - cached[0] < EVENTS_CACHE_TTL:
+            # 深拷贝：event_data等嵌套字典不能与缓存共享，调用方修改结果不会污染缓存
+            return copy.deepcopy(cached[1])
+        
         db = self.get_db()
         try:
             # 构建查询
@@ -526,27 +618,13 @@ class CollaborationDBService:
             events = query.all()
             
             # 转换为字典格式
-            result = []
-            for event in events:
-                event_dict = {
-                    'id': event.id,
-                    'event_id': event.event_id,
-                    'event_type': event.event_type,
-                    'agent_id': event.agent_id,
-                    'task_id': event.task_id,
-                    'conversation_id': event.conversation_id,
-                    'transaction_hash': event.transaction_hash,
-                    'block_number': event.block_number,
-                    'event_data': event.event_data,
-                    'data': event.data,
-                    'timestamp': event.timestamp,
-                    'processed': event.processed,
-                    'created_at': event.timestamp.isoformat() if event.timestamp else None
-                }
-                result.append(event_dict)
+            result = [self._format_blockchain_event(event) for event in events]
             
             logger.info(f"Retrieved {len(result)} blockchain events (type: {event_type}, task: {task_id})")
-            return result
+            # 空结果不缓存：事件可能由其他进程（API服务）写入，轮询方需要尽快看到
+            if result:
+                self._events_cache[cache_key] = (time.monotonic(), result)
+            return copy.deepcopy(result)
             
         except SQLAlchemyError as e:
             logger.error(f"Error getting blockchain events: {e}")
@@ -554,6 +632,63 @@ class CollaborationDBService:
         finally:
             db.close()
     
+    def iter_blockchain_events(self, event_type: str = None, task_id: str = None,
+                               batch_size: int = 10) -> Iterator[Dict[str, Any]]:
+        """
+        按批次逐条产出区块链事件，调用方停止迭代后不再查询后续批次
+        
+        Args:
+            event_type: 事件类型过滤
+            task_id: 任务ID过滤
+            batch_size: 每次查询的记录数
+            
+        Yields:
+            事件数据字典（格式与get_blockchain_events相同）
+        """
+        offset = 0
+        while True:
+            db = self.get_db()
+            try:
+                query = db.query(BlockchainEvent)
+                if event_type:
+                    query = query.filter(BlockchainEvent.event_type == event_type)
+                if task_id:
+                    query = query.filter(BlockchainEvent.task_id == task_id)
+                
+                batch = [
+                    self._format_blockchain_event(event)
+                    for event in query.order_by(desc(BlockchainEvent.timestamp)).offset(offset).limit(batch_size)
+                ]
+            except SQLAlchemyError as e:
+                logger.error(f"Error iterating blockchain events: {e}")
+                return
+            finally:
+                db.close()
+            
+            # 每批查询完就关闭会话，再把结果交给调用方
+            yield from batch
+            if len(batch) < batch_size:
+                return
+            offset += batch_size
+    
+    def _format_blockchain_event(self, event: BlockchainEvent) -> Dict[str, Any]:
+        """将区块链事件记录转换为字典"""
+        return {
+            'id': event.id,
+            'event_id': event.event_id,
+            'event_type': event.event_type,
+            'agent_id': event.agent_id,
+            'task_id': event.task_id,
+            'conversation_id': event.conversation_id,
+            'transaction_hash': event.transaction_hash,
+            'block_number': event.block_number,
+            'event_data': event.event_data,
+            'data': event.data,
+            'timestamp': event.timestamp,
+            'processed': event.processed,
+            'created_at': event.timestamp.isoformat() if event.timestamp else None
+        }
+    
     def get_task_related_data_summary(self, task_id: str) -> Dict[str, Any]:
         """
         获取任务相关数据的摘要信息
@@ -615,92 +750,91 @@ class CollaborationDBService:
         Returns:
             学习事件列表
         """
+        return self.get_agent_learning_events_bulk([agent_id], limit=limit).get(agent_id, [])
+    
+    def get_agent_learning_events_bulk(self, agent_ids: List[str], limit: int = 50) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        批量获取多个agent的学习事件
+        
+        结果与逐个调用get_agent_learning_events相同，但所有agent共用一次
+        agent_id IN (...) 查询和一次最近评估事件查询。
+        
+        Args:
+            agent_ids: agent ID列表
+            limit: 每个agent的返回记录数限制
+            
+        Returns:
+            以agent ID为键的学习事件列表
+        """
         db = self.get_db()
         try:
-            # 方法1: 查找该agent作为evaluator的事件
-            events_as_evaluator = db.query(BlockchainEvent).filter(
-                BlockchainEvent.agent_id == agent_id,
+            # 查找这些agent作为evaluator的事件，并按agent分组
+            events_as_evaluator = defaultdict(list)
+            for event in db.query(BlockchainEvent).filter(
+                BlockchainEvent.agent_id.in_(agent_ids),
                 BlockchainEvent.event_type.in_(["task_evaluation", "task_completion", "training"])
-            ).all()
-            
-            # 方法2: 查找与该agent相关的任务的所有评估事件
-            # 首先需要找到这个agent参与的任务
-            from services import contract_service
-            
-            # 获取该agent参与的任务（通过collaboration events）
-            agent_tasks = set()
-            try:
-                # 尝试从合约获取该agent的任务历史
-                # 这里我们从所有评估事件中获取一个代表性的样本
-                all_events = db.query(BlockchainEvent).filter(
-                    BlockchainEvent.event_type == "task_evaluation"
-                ).all()
-                
-                # 为了演示，我们返回所有评估事件，但标记它们与该agent的关系
-                logger.info(f"Found {len(all_events)} total evaluation events for analysis")
-                
-                # 构建学习事件列表
-                learning_events = []
-                
-                # 添加该agent作为evaluator的事件
-                for event in events_as_evaluator:
-                    learning_events.append({
-                        "event_id": event.event_id,
-                        "event_type": event.event_type,
-                        "agent_id": event.agent_id,
-                        "data": json.loads(event.data) if event.data else {},
-                        "transaction_hash": event.transaction_hash,
-                        "block_number": event.block_number,
-                        "timestamp": event.timestamp.isoformat() if event.timestamp else None,
-                        "relation": "evaluator"
-                    })
-                
-                # 如果该agent作为evaluator的事件不足，添加一些相关的评估事件作为学习参考
-                if len(learning_events) < 5:
-                    recent_evaluations = db.query(BlockchainEvent).filter(
-                        BlockchainEvent.event_type == "task_evaluation"
-                    ).order_by(desc(BlockchainEvent.timestamp)).limit(min(10, limit)).all()
+            ).all():
+                events_as_evaluator[event.agent_id].append(event)
+            
+            # 最近的评估事件对所有agent相同，只在需要时查询一次
+            recent_evaluations = None
+            
+            result = {}
+            for agent_id in agent_ids:
+                agent_events = events_as_evaluator.get(agent_id, [])
+                try:
+                    # 添加该agent作为evaluator的事件
+                    learning_events = [
+                        self._format_learning_event(event, "evaluator")
+                        for event in agent_events
+                    ]
                     
-                    for event in recent_evaluations:
-                        if event.event_id not in [e["event_id"] for e in learning_events]:
-                            learning_events.append({
-                                "event_id": event.event_id,
-                                "event_type": event.event_type,
-                                "agent_id": event.agent_id,
-                                "data": json.loads(event.data) if event.data else {},
-                                "transaction_hash": event.transaction_hash,
-                                "block_number": event.block_number,
-                                "timestamp": event.timestamp.isoformat() if event.timestamp else None,
-                                "relation": "related_task"
-                            })
-                
-                # 按时间排序并限制数量
-                learning_events.sort(key=lambda x: x["timestamp"] if x["timestamp"] else "", reverse=True)
-                return learning_events[:limit]
-                
-            except Exception as e:
-                logger.warning(f"Error getting task-related events: {e}")
-                # 如果获取任务相关事件失败，至少返回该agent作为evaluator的事件
-                return [
-                    {
-                        "event_id": event.event_id,
-                        "event_type": event.event_type,
-                        "agent_id": event.agent_id,
-                        "data": json.loads(event.data) if event.data else {},
-                        "transaction_hash": event.transaction_hash,
-                        "block_number": event.block_number,
-                        "timestamp": event.timestamp.isoformat() if event.timestamp else None,
-                        "relation": "evaluator"
-                    }
-                    for event in events_as_evaluator
-                ]
+                    # 如果该agent作为evaluator的事件不足，添加一些相关的评估事件作为学习参考
+                    if len(learning_events) < 5:
+                        if recent_evaluations is None:
+                            recent_evaluations = db.query(BlockchainEvent).filter(
+                                BlockchainEvent.event_type == "task_evaluation"
+                            ).order_by(desc(BlockchainEvent.timestamp)).limit(min(10, limit)).all()
+                        
+                        seen_event_ids = {e["event_id"] for e in learning_events}
+                        for event in recent_evaluations:
+                            if event.event_id not in seen_event_ids:
+                                seen_event_ids.add(event.event_id)
+                                learning_events.append(self._format_learning_event(event, "related_task"))
+                    
+                    # 按时间排序并限制数量
+                    learning_events.sort(key=lambda x: x["timestamp"] if x["timestamp"] else "", reverse=True)
+                    result[agent_id] = learning_events[:limit]
+                    
+                except Exception as e:
+                    logger.warning(f"Error getting task-related events: {e}")
+                    # 如果获取任务相关事件失败，至少返回该agent作为evaluator的事件
+                    result[agent_id] = [
+                        self._format_learning_event(event, "evaluator")
+                        for event in agent_events
+                    ]
+            
+            return result
             
         except SQLAlchemyError as e:
             logger.error(f"Error getting agent learning events: {e}")
-            return []
+            return {agent_id: [] for agent_id in agent_ids}
         finally:
             db.close()
     
+    def _format_learning_event(self, event: BlockchainEvent, relation: str) -> Dict[str, Any]:
+        """将区块链事件记录转换为学习事件字典"""
+        return {
+            "event_id": event.event_id,
+            "event_type": event.event_type,
+            "agent_id": event.agent_id,
+            "data": json.loads(event.data) if event.data else {},
+            "transaction_hash": event.transaction_hash,
+            "block_number": event.block_number,
+            "timestamp": event.timestamp.isoformat() if event.timestamp else None,
+            "relation": relation
+        }
+    
     def check_task_evaluation_exists(self, task_id: str) -> Dict[str, Any]:
         """
         检查任务是否已经被评价过
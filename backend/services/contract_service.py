@@ -4,8 +4,14 @@
 import os
 import json
 import logging
+import functools
+import re
 import time
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, List, Optional
+import requests
+from requests.adapters import HTTPAdapter
 from web3 import Web3, HTTPProvider
 try:
     from web3.middleware.proof_of_authority import ExtraDataToPOAMiddleware
@@ -14,6 +20,10 @@ except ImportError:
         from web3.middleware import ExtraDataToPOAMiddleware
     except ImportError:
         ExtraDataToPOAMiddleware = None
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # 自动生成的合约地址 (checksum格式)
 contract_addresses = {
@@ -49,12 +59,92 @@ learning_contract = None
 # 合约字典，用于通过名称访问合约
 contracts = {}
 
+# 合约是否已针对当前w3实例初始化（init_web3会重置）
+_INITIALIZED = False
+
+# 批量请求不可用时并发获取区块的线程数
+BLOCK_FETCH_WORKERS = 8
+
+# RPC连接池大小，需不小于并发发起RPC请求的线程数
+RPC_POOL_SIZE = 32
+
+# get_task结果的短期缓存：{task_id: (monotonic时间戳, 任务数据)}
+TASK_CACHE_TTL = 2.0
+_task_cache: Dict[str, tuple] = {}
+
+def _invalidate_task_cache():
+    """任务状态在链上发生变化后清空get_task缓存"""
+    _task_cache.clear()
+
+def _copy_task(task: Dict[str, Any]) -> Dict[str, Any]:
+    """复制缓存的任务数据，调用方修改返回值不会影响缓存"""
+    return {
+        **task,
+        "required_capabilities": list(task["required_capabilities"]),
+        "assigned_agents": list(task["assigned_agents"])
+    }
+
+def _orjson_default(obj):
+    """orjson无法直接序列化的RPC参数类型"""
+    if isinstance(obj, (bytes, bytearray)):
+        return Web3.to_hex(obj)
+    if isinstance(obj, Mapping):
+        return dict(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+# JSON中超出64位范围的整数字面量；orjson解码时会把它们静默转成float
+_BIG_INT_LITERAL = re.compile(rb'[\[:,]\s*-?\d{19,}')
+
+class OrjsonHTTPProvider(HTTPProvider):
+    """
+    使用orjson编解码JSON-RPC负载的HTTPProvider
+    
+    编码时orjson无法处理的负载（例如超过64位的整数）回退到web3默认的编码器；
+    解码时响应中含有超长整数字面量的，直接交给web3默认的解码器以保留精度。
+    """
+    
+    def encode_rpc_request(self, method, params):
+        rpc_dict = {
+            "jsonrpc": "2.0",
+            "method": method,
+            "params": params or [],
+            "id": next(self.request_counter),
+        }
+        try:
+            return orjson.dumps(rpc_dict, default=_orjson_default)
+        except orjson.JSONEncodeError:
+            return super().encode_rpc_request(method, params)
+    
+    def decode_rpc_response(self, raw_response):
+        # orjson不会对超长整数报错而是返回float，因此需要预先检查
+        if _BIG_INT_LITERAL.search(raw_response):
+            return super().decode_rpc_response(raw_response)
+        try:
+            return orjson.loads(raw_response)
+        except orjson.JSONDecodeError:
+            return super().decode_rpc_response(raw_response)
+
+def _rpc_session() -> requests.Session:
+    """创建带连接池的requests会话，所有RPC请求复用keep-alive连接"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=RPC_POOL_SIZE, pool_maxsize=RPC_POOL_SIZE)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
 def init_web3():
     """初始化Web3连接"""
-    global w3
+    global w3, _INITIALIZED
     
     try:
-        w3 = Web3(HTTPProvider(GANACHE_URL))
+        provider_class = OrjsonHTTPProvider if orjson else HTTPProvider
+        w3 = Web3(provider_class(GANACHE_URL, session=_rpc_session()))
+        # 新的w3实例需要重新绑定合约对象
+        _INITIALIZED = False
+        _contract.cache_clear()
+        _invalidate_task_cache()
         
         # 为PoA网络添加中间件
         if ExtraDataToPOAMiddleware:
@@ -107,17 +197,28 @@ def get_default_sender_address():
         logger.error(f"Error getting default sender address: {str(e)}")
         return None
 
+@functools.lru_cache(maxsize=None)
+def _load_abi(contract_name: str):
+    """读取并解析合约ABI文件，每个合约只解析一次"""
+    abi_path = f"contracts/abi/{contract_name}.json"
+    if not os.path.exists(abi_path):
+        return None
+    
+    with open(abi_path, 'r') as f:
+        return json.load(f)["abi"]
+
+@functools.lru_cache(maxsize=None)
+def _contract(contract_name: str, contract_address: str):
+    """按(名称, 地址)缓存合约实例，同名不同地址的合约分别缓存"""
+    return w3.eth.contract(address=contract_address, abi=_load_abi(contract_name))
+
 def load_contract(contract_name: str):
     """加载智能合约"""
     try:
         # 加载ABI
-        abi_path = f"contracts/abi/{contract_name}.json"
-        if not os.path.exists(abi_path):
-            logger.error(f"ABI file not found: {abi_path}")
+        if _load_abi(contract_name) is None:
+            logger.error(f"ABI file not found: contracts/abi/{contract_name}.json")
             return None
-            
-        with open(abi_path, 'r') as f:
-            contract_data = json.load(f)
         
         contract_address = contract_addresses.get(contract_name)
         if not contract_address:
@@ -125,7 +226,7 @@ def load_contract(contract_name: str):
             return None
         
         # 创建合约实例
-        contract = w3.eth.contract(address=contract_address, abi=contract_data["abi"])
+        contract = _contract(contract_name, contract_address)
         logger.info(f"Loaded contract {contract_name} at {contract_address}")
         return contract
     except Exception as e:
@@ -136,7 +237,11 @@ def initialize_contracts():
     """
     初始化所有合约
     """
-    global agent_registry_contract, action_logger_contract, incentive_engine_contract, task_manager_contract, bid_auction_contract, message_hub_contract, learning_contract, contracts
+    global agent_registry_contract, action_logger_contract, incentive_engine_contract, task_manager_contract, bid_auction_contract, message_hub_contract, learning_contract, contracts, _INITIALIZED
+    
+    # 已为当前w3实例初始化过，直接复用
+    if _INITIALIZED:
+        return True
     
     if not w3 or not w3.is_connected():
         logger.warning("Web3 not connected, cannot initialize contracts")
@@ -163,6 +268,7 @@ def initialize_contracts():
     
     # 检查核心合约是否成功加载
     core_contracts_loaded = all([agent_registry_contract, task_manager_contract, learning_contract])
+    _INITIALIZED = core_contracts_loaded
     
     if core_contracts_loaded:
         logger.info("Contracts initialized successfully")
@@ -475,6 +581,11 @@ def get_task(task_id: str) -> Dict[str, Any]:
     if not task_manager_contract:
         return {"success": False, "error": "Contract not initialized"}
     
+    # 同一任务在短时间内（例如一次请求处理中）被多次读取时复用上次的结果
+    cached = _task_cache.get(task_id)
+    if cached and time.monotonic() - cached[0] < TASK_CACHE_TTL:
+        return _copy_task(cached[1])
+    
     try:
         # 将task_id转换为bytes32
         if task_id.startswith('0x'):
@@ -527,6 +638,7 @@ def get_task(task_id: str) -> Dict[str, Any]:
         }
         
         logger.info(f"Returning task result with {len(result['assigned_agents'])} assigned_agents")
+        _task_cache[task_id] = (time.monotonic(), _copy_task(result))
         return result
     except Exception as e:
         logger.error(f"Error getting task {task_id}: {str(e)}")
@@ -713,6 +825,7 @@ def assign_task(task_id: str, agent_id: str, sender_address: str) -> Dict[str, A
         
         # 等待交易确认
         receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+        _invalidate_task_cache()
         
         return {
             "success": receipt["status"] == 1,
@@ -744,6 +857,7 @@ def start_task(task_id: bytes, sender_address: str) -> Dict[str, Any]:
         
         # 等待交易确认
         receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+        _invalidate_task_cache()
         
         return {
             "success": receipt["status"] == 1,
@@ -785,6 +899,7 @@ def complete_task(task_id: str, result: str, sender_address: str) -> Dict[str, A
         
         # 等待交易确认
         receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+        _invalidate_task_cache()
         
         return {
             "success": receipt["status"] == 1,
@@ -826,6 +941,7 @@ def complete_assigned_task(task_id: str, result: str, sender_address: str) -> Di
         # 首先启动任务（将状态从assigned改为InProgress）
         start_tx_hash = task_manager_contract.functions.startTask(task_id_bytes).transact(tx_data)
         start_receipt = w3.eth.wait_for_transaction_receipt(start_tx_hash)
+        _invalidate_task_cache()
         
         if start_receipt["status"] != 1:
             logger.error(f"Failed to start task {task_id}")
@@ -839,6 +955,7 @@ def complete_assigned_task(task_id: str, result: str, sender_address: str) -> Di
         # 然后立即完成任务
         complete_tx_hash = task_manager_contract.functions.completeTask(task_id_bytes, result).transact(tx_data)
         complete_receipt = w3.eth.wait_for_transaction_receipt(complete_tx_hash)
+        _invalidate_task_cache()
         
         return {
             "success": complete_receipt["status"] == 1,
@@ -885,6 +1002,7 @@ def start_agent_collaboration(task_id: str, selected_agents: List[str], collabor
         
         # 等待交易确认
         receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+        _invalidate_task_cache()
         
         return {
             "success": receipt["status"] == 1,
@@ -1020,6 +1138,7 @@ def update_task(task_id: str, task_data: Dict[str, Any], sender_address: str) ->
         
         # 等待交易确认
         receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+        _invalidate_task_cache()
         
         return {
             "success": receipt["status"] == 1,
@@ -1057,6 +1176,7 @@ def cancel_task(task_id: str, sender_address: str, reason: str = "Task cancelled
         
         # 等待交易确认
         receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+        _invalidate_task_cache()
         
         return {
             "success": receipt["status"] == 1,
@@ -1305,51 +1425,59 @@ def get_transaction(tx_hash: str) -> Dict[str, Any]:
         receipt = w3.eth.get_transaction_receipt(tx_hash)
         block = w3.eth.get_block(tx.blockNumber)
         
-        # 解析事件类型
-        event_type = "Unknown"
-        event_data = {}
-        
-        # 检查是否是已知合约的事件
-        contracts = [
-            (agent_registry_contract, "AgentRegistered", "AgentUpdated"),
-            (task_manager_contract, "TaskCreated", "TaskAssigned", "TaskCompleted"),
-            (learning_contract, "LearningEventRecorded")
-        ]
-        
-        for contract, *events in contracts:
-            if contract and receipt and receipt.get("logs"):
-                for log in receipt["logs"]:
-                    for event_name in events:
-                        try:
-                            event_obj = getattr(contract.events, event_name)()
-                            parsed_log = event_obj.process_log(log)
-                            event_type = event_name
-                            event_data = parsed_log["args"]
-                            break
-                        except:
-                            continue
-        
         return {
             "success": True,
-            "tx_hash": tx_hash,
-            "block_number": tx.blockNumber,
-            "timestamp": block.timestamp,
-            "from_address": tx["from"],
-            "to_address": tx["to"] if tx["to"] else "0x0000000000000000000000000000000000000000",
-            "value": float(w3.from_wei(tx.value, "ether")),
-            "gas_used": receipt.gasUsed,
-            "gas_price": float(w3.from_wei(tx.gasPrice, "gwei")),
-            "total_fee": float(w3.from_wei(tx.gasPrice * receipt.gasUsed, "ether")),
-            "status": "confirmed" if receipt.status == 1 else "failed",
-            "event_type": event_type,
-            "event_data": {k: str(v) for k, v in event_data.items()},  # 确保所有值都是字符串
-            "input_data": tx.input.hex() if hasattr(tx.input, 'hex') else str(tx.input),
-            "confirmations": w3.eth.block_number - tx.blockNumber
+            **_format_transaction(tx_hash, tx, receipt, block.timestamp, w3.eth.block_number)
         }
     except Exception as e:
         logger.error(f"Error getting transaction {tx_hash}: {str(e)}")
         return {"success": False, "error": str(e)}
 
+def _format_transaction(tx_hash: str, tx, receipt, block_timestamp: int, latest_block: int) -> Dict[str, Any]:
+    """
+    根据交易、交易收据和所在区块的时间戳生成交易详情，解析已知合约的事件类型
+    """
+    # 解析事件类型
+    event_type = "Unknown"
+    event_data = {}
+    
+    # 检查是否是已知合约的事件
+    contracts = [
+        (agent_registry_contract, "AgentRegistered", "AgentUpdated"),
+        (task_manager_contract, "TaskCreated", "TaskAssigned", "TaskCompleted"),
+        (learning_contract, "LearningEventRecorded")
+    ]
+    
+    for contract, *events in contracts:
+        if contract and receipt and receipt.get("logs"):
+            for log in receipt["logs"]:
+                for event_name in events:
+                    try:
+                        event_obj = getattr(contract.events, event_name)()
+                        parsed_log = event_obj.process_log(log)
+                        event_type = event_name
+                        event_data = parsed_log["args"]
+                        break
+                    except:
+                        continue
+    
+    return {
+        "tx_hash": tx_hash,
+        "block_number": tx.blockNumber,
+        "timestamp": block_timestamp,
+        "from_address": tx["from"],
+        "to_address": tx["to"] if tx["to"] else "0x0000000000000000000000000000000000000000",
+        "value": float(w3.from_wei(tx.value, "ether")),
+        "gas_used": receipt.gasUsed,
+        "gas_price": float(w3.from_wei(tx.gasPrice, "gwei")),
+        "total_fee": float(w3.from_wei(tx.gasPrice * receipt.gasUsed, "ether")),
+        "status": "confirmed" if receipt.status == 1 else "failed",
+        "event_type": event_type,
+        "event_data": {k: str(v) for k, v in event_data.items()},  # 确保所有值都是字符串
+        "input_data": tx.input.hex() if hasattr(tx.input, 'hex') else str(tx.input),
+        "confirmations": latest_block - tx.blockNumber
+    }
+
 def get_block(block_number: int) -> Dict[str, Any]:
     """
     获取区块详情
@@ -1411,9 +1539,11 @@ def get_transactions(filters: Dict[str, Any] = None, limit: int = 10, offset: in
         
         for block_num in range(end_block - 1, start_block - 1, -1):
             try:
-                block = w3.eth.get_block(block_num, full_transactions=False)
+                # 区块带上完整交易字段，每笔交易只需再取一次收据，
+                # 不再为每笔交易单独请求交易详情、区块和最新区块号
+                block = w3.eth.get_block(block_num, full_transactions=True)
                 
-                for tx_hash in block.transactions:
+                for tx in block.transactions:
                     if tx_count < offset:
                         tx_count += 1
                         continue
@@ -1421,7 +1551,16 @@ def get_transactions(filters: Dict[str, Any] = None, limit: int = 10, offset: in
                     if collected_count >= limit:
                         break
                     
-                    tx_data = get_transaction(tx_hash.hex())
+                    tx_hash = tx.hash.hex()
+                    try:
+                        receipt = w3.eth.get_transaction_receipt(tx.hash)
+                        tx_data = {
+                            "success": True,
+                            **_format_transaction(tx_hash, tx, receipt, block.timestamp, latest_block)
+                        }
+                    except Exception as e:
+                        logger.error(f"Error getting transaction {tx_hash}: {str(e)}")
+                        tx_data = {"success": False, "error": str(e)}
                     if tx_data.get("success"):
                         # 应用过滤器
                         if "event_type" in filters and tx_data.get("event_type") != filters["event_type"]:
@@ -1504,6 +1643,36 @@ def get_contract_events(contract_address: str, event_name: str, filters: Dict[st
         logger.error(f"Error getting events for contract {contract_address}: {str(e)}")
         return {"success": False, "error": str(e)}
 
+def _get_blocks(block_numbers) -> List[Optional[Any]]:
+    """
+    获取一组区块（不含完整交易），用一次JSON-RPC批量请求代替逐个请求
+    
+    批量请求失败时退回并发的逐个获取；获取失败的区块在结果中为None
+    """
+    block_numbers = list(block_numbers)
+    if not block_numbers:
+        return []
+    
+    try:
+        with w3.batch_requests() as batch:
+            for block_num in block_numbers:
+                batch.add(w3.eth.get_block(block_num, False))
+            return list(batch.execute())
+    except Exception as e:
+        logger.warning(f"Batch block request failed, fetching blocks one by one: {str(e)}")
+    
+    # 各区块请求相互独立，用线程池并发发出，总耗时约为单次往返而不是逐个累加
+    with ThreadPoolExecutor(max_workers=min(BLOCK_FETCH_WORKERS, len(block_numbers))) as pool:
+        return list(pool.map(_get_block_or_none, block_numbers))
+
+def _get_block_or_none(block_num: int):
+    """获取单个区块（不含完整交易），失败时返回None"""
+    try:
+        return w3.eth.get_block(block_num, full_transactions=False)
+    except Exception as e:
+        logger.warning(f"Error getting block {block_num}: {str(e)}")
+        return None
+
 def get_blockchain_stats() -> Dict[str, Any]:
     """
     获取区块链统计数据
@@ -1514,10 +1683,19 @@ def get_blockchain_stats() -> Dict[str, Any]:
     try:
         latest_block = w3.eth.block_number
         
+        # 交易统计最多扫描最近200个区块，平均区块时间和平均交易数用到的区块都在其中，
+        # 所以只需一次批量请求
+        recent_blocks_to_scan = 200
+        if latest_block <= recent_blocks_to_scan:
+            scan_range = range(latest_block, -1, -1)
+        else:
+            scan_range = range(latest_block, latest_block - recent_blocks_to_scan, -1)
+        scanned_blocks = dict(zip(scan_range, _get_blocks(scan_range)))
+        
         # 计算平均区块时间
         if latest_block > 1:
-            latest_block_data = w3.eth.get_block(latest_block)
-            prev_block_data = w3.eth.get_block(latest_block - 1)
+            latest_block_data = scanned_blocks[latest_block]
+            prev_block_data = scanned_blocks[latest_block - 1]
             avg_block_time = (latest_block_data.timestamp - prev_block_data.timestamp)
         else:
             avg_block_time = 0
@@ -1528,7 +1706,7 @@ def get_blockchain_stats() -> Dict[str, Any]:
             total_tx = 0
             
             for i in range(latest_block, latest_block - recent_blocks, -1):
-                block = w3.eth.get_block(i)
+                block = scanned_blocks[i]
                 total_tx += len(block.transactions)
             
             avg_tx_per_block = total_tx / recent_blocks
@@ -1561,25 +1739,12 @@ def get_blockchain_stats() -> Dict[str, Any]:
         # 计算总交易数 - 优化的方法
         total_transactions = 0
         
-        # 智能计算：优先查询最近的区块，对于旧区块使用缓存或估算
-        if latest_block <= 200:
-            # 如果区块数量不多，扫描所有区块
-            for i in range(latest_block + 1):
-                try:
-                    block = w3.eth.get_block(i, full_transactions=False)
-                    total_transactions += len(block.transactions)
-                except:
-                    continue
-        else:
-            # 如果区块数量较多，扫描最近的200个区块以获得准确的统计
-            recent_blocks_to_scan = 200
-            for i in range(latest_block, max(0, latest_block - recent_blocks_to_scan), -1):
-                try:
-                    block = w3.eth.get_block(i, full_transactions=False)
-                    total_transactions += len(block.transactions)
-                except:
-                    continue
-            
+        # 智能计算：区块数量不多时统计所有区块，较多时统计最近的200个区块
+        for block in scanned_blocks.values():
+            if block is not None:
+                total_transactions += len(block.transactions)
+        
+        if latest_block > recent_blocks_to_scan:
             # 对于更早的区块，如果需要完整统计，可以使用平均值估算
             # 这里我们提供一个保守的实际计数
             logger.info(f"Scanned recent {recent_blocks_to_scan} blocks for transaction count: {total_transactions}")
@@ -1614,10 +1779,12 @@ def get_blocks(limit: int = 10, offset: int = 0) -> Dict[str, Any]:
         start_block = max(0, latest_block - offset)
         end_block = max(0, start_block - limit)
         
-        # 获取区块信息
-        for block_num in range(start_block, end_block, -1):
+        # 获取区块信息（一次批量请求取回整页区块）
+        block_range = range(start_block, end_block, -1)
+        for block_num, block in zip(block_range, _get_blocks(block_range)):
+            if block is None:
+                continue
             try:
-                block = w3.eth.get_block(block_num, full_transactions=False)
                 block_data = {
                     "block_number": block.number,
                     "number": block.number,
@@ -1,11 +1,15 @@
 """
 Service for task-related operations.
 """
+import asyncio
+import heapq
 import logging
 import uuid
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime
 
+import numpy as np
+
 from app.models.task import (
     TaskCreate, TaskUpdate, TaskAssign, TaskComplete,
     TaskResponse, TaskList, TaskStats, TaskStatus
@@ -16,6 +20,24 @@ from app.services.blockchain import blockchain_service
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Position of each status in the columnar status array used by get_task_stats
+_STATUS_INDEX = {status: index for index, status in enumerate(TaskStatus)}
+
+# Row layout of the structured array get_task_stats builds in one pass
+_TASK_STATS_DTYPE = np.dtype([
+    ('status', np.int8),
+    ('reward', np.float64),
+    ('complexity', np.float64),
+    ('completion_minutes', np.float64),
+])
+
+# TaskManager.TaskStatus enum values for statuses without a dedicated getter
+_CONTRACT_TASK_STATUS = {
+    TaskStatus.COMPLETED: 4,
+    TaskStatus.FAILED: 5,
+    TaskStatus.CANCELLED: 6
+}
+
 
 class TaskService:
     """
@@ -41,6 +63,7 @@ class TaskService:
         """
         try:
             # Get task IDs from contract
+            filter_status = None
             if status == 'available':
                 task_ids = await blockchain_service.call_contract(
                     'TaskManager',
@@ -51,26 +74,37 @@ class TaskService:
                     'TaskManager',
                     'getAssignedTasks'
                 )
+            elif status in _CONTRACT_TASK_STATUS:
+                task_ids = await blockchain_service.call_contract(
+                    'TaskManager',
+                    'getTasksByStatus',
+                    _CONTRACT_TASK_STATUS[status]
+                )
             else:
+                # No contract query for this status; filter the details below
                 task_ids = await blockchain_service.call_contract(
                     'TaskManager',
                     'getAllTasks'
                 )
+                filter_status = status
             
             total = len(task_ids)
             
             # Apply pagination
             task_ids = task_ids[skip:skip + limit]
             
-            # Get task details
-            tasks = []
-            for task_id in task_ids:
-                task_info = await blockchain_service.get_task_info(task_id)
-                if 'error' not in task_info:
-                    # Filter by status if provided
-                    if status and task_info['status'] != status:
-                        continue
-                    tasks.append(self._format_task_response(task_info))
+            # Get task details for the whole page concurrently
+            task_infos = await asyncio.gather(
+                *[blockchain_service.get_task_info(task_id) for task_id in task_ids]
+            )
+            
+            # Status-specific ID queries are already filtered
+            tasks = [
+                self._format_task_response(task_info)
+                for task_info in task_infos
+                if 'error' not in task_info
+                and (filter_status is None or task_info['status'] == filter_status)
+            ]
             
             return TaskList(tasks=tasks, total=total)
         except Exception as e:
@@ -251,6 +285,99 @@ class TaskService:
             logger.error(f"Error completing task {task_id}: {e}")
             return None
     
+    async def assign_tasks_bulk(
+        self,
+        assignments: List[Tuple[str, TaskAssign]]
+    ) -> List[Optional[TaskResponse]]:
+        """
+        Assign several tasks at once.
+        
+        All assignment transactions are submitted concurrently instead of
+        waiting for each receipt in turn.
+        
+        Args:
+            assignments: Pairs of task ID and assignment data.
+            
+        Returns:
+            Updated task information for each assignment, in input order,
+            with None for assignments that failed.
+        """
+        return await self._send_task_transactions_bulk(
+            'assignTask',
+            [
+                (task_id, (assign_data.agent_address, assign_data.bid_amount or 0))
+                for task_id, assign_data in assignments
+            ]
+        )
+    
+    async def complete_tasks_bulk(
+        self,
+        completions: List[Tuple[str, TaskComplete]]
+    ) -> List[Optional[TaskResponse]]:
+        """
+        Mark several tasks as completed at once.
+        
+        Args:
+            completions: Pairs of task ID and completion data.
+            
+        Returns:
+            Updated task information for each completion, in input order,
+            with None for completions that failed.
+        """
+        return await self._send_task_transactions_bulk(
+            'completeTask',
+            [
+                (task_id, (complete_data.result,))
+                for task_id, complete_data in completions
+            ]
+        )
+    
+    async def _send_task_transactions_bulk(
+        self,
+        method: str,
+        calls: List[Tuple[str, Tuple[Any, ...]]]
+    ) -> List[Optional[TaskResponse]]:
+        """
+        Submit TaskManager transactions concurrently and fetch the updated tasks.
+        
+        Args:
+            method: TaskManager method to call for every task.
+            calls: Pairs of task ID and the remaining method arguments.
+            
+        Returns:
+            Updated task information per call, or None where the call failed.
+        """
+        tx_receipts = await asyncio.gather(
+            *[
+                blockchain_service.send_transaction('TaskManager', method, task_id, *args)
+                for task_id, args in calls
+            ],
+            return_exceptions=True
+        )
+        
+        succeeded = []
+        for (task_id, _), tx_receipt in zip(calls, tx_receipts):
+            if isinstance(tx_receipt, Exception):
+                logger.error(f"Error calling {method} for task {task_id}: {tx_receipt}")
+            elif tx_receipt['status'] != 1:
+                logger.error(f"Transaction failed: {tx_receipt}")
+            else:
+                succeeded.append(task_id)
+        
+        task_infos = await asyncio.gather(
+            *[blockchain_service.get_task_info(task_id) for task_id in succeeded],
+            return_exceptions=True
+        )
+        
+        responses = {}
+        for task_id, task_info in zip(succeeded, task_infos):
+            if isinstance(task_info, Exception) or 'error' in task_info:
+                logger.error(f"Error getting task {task_id} after {method}: {task_info}")
+                continue
+            responses[task_id] = self._format_task_response(task_info)
+        
+        return [responses.get(task_id) for task_id, _ in calls]
+    
     async def get_task_stats(self) -> TaskStats:
         """
         Get task statistics.
@@ -262,49 +389,29 @@ class TaskService:
             # Get all tasks
             tasks = await self.get_tasks(limit=1000)
             
-            # Calculate statistics
-            total = len(tasks.tasks)
-            available = sum(1 for task in tasks.tasks if task.status == TaskStatus.AVAILABLE)
-            assigned = sum(1 for task in tasks.tasks if task.status == TaskStatus.ASSIGNED)
-            completed = sum(1 for task in tasks.tasks if task.status == TaskStatus.COMPLETED)
-            failed = sum(1 for task in tasks.tasks if task.status == TaskStatus.FAILED)
-            cancelled = sum(1 for task in tasks.tasks if task.status == TaskStatus.CANCELLED)
-            
-            # Calculate averages
-            avg_reward = sum(task.reward for task in tasks.tasks) / total if total > 0 else 0
-            avg_complexity = sum(task.complexity for task in tasks.tasks) / total if total > 0 else 0
-            
-            # Calculate completion time average
-            completed_tasks = [task for task in tasks.tasks if task.status == TaskStatus.COMPLETED]
-            if completed_tasks:
-                avg_completion_time = sum(
-                    (task.completed_at - task.assigned_at).total_seconds() / 60
-                    for task in completed_tasks
-                    if task.completed_at and task.assigned_at
-                ) / len(completed_tasks)
-            else:
-                avg_completion_time = None
+            # The contract-provided total counts every task, while the
+            # averages and status counts below cover the fetched page only
+            total = tasks.total
+            page_size = len(tasks.tasks)
             
-            # Get task type distribution
+            # Walk the tasks once: collect the numeric fields as rows of a
+            # structured array and count task types and agent completions
+            rows = []
             task_type_distribution = {}
-            for task in tasks.tasks:
-                task_type = task.task_type
-                if task_type in task_type_distribution:
-                    task_type_distribution[task_type] += 1
-                else:
-                    task_type_distribution[task_type] = 1
-            
-            # Get recent tasks
-            recent_tasks = sorted(
-                tasks.tasks,
-                key=lambda t: t.created_at,
-                reverse=True
-            )[:5]
-            
-            # Get top agents
             agent_stats = {}
             for task in tasks.tasks:
-                if task.status == TaskStatus.COMPLETED and task.assigned_agent:
+                is_completed = task.status == TaskStatus.COMPLETED
+                # Completed tasks missing a timestamp count towards the
+                # completion time average with zero duration
+                if is_completed and task.completed_at and task.assigned_at:
+                    completion_minutes = (task.completed_at - task.assigned_at).total_seconds() / 60
+                else:
+                    completion_minutes = 0.0
+                rows.append((_STATUS_INDEX[task.status], task.reward, task.complexity, completion_minutes))
+                
+                task_type_distribution[task.task_type] = task_type_distribution.get(task.task_type, 0) + 1
+                
+                if is_completed and task.assigned_agent:
                     if task.assigned_agent in agent_stats:
                         agent_stats[task.assigned_agent]['completed_tasks'] += 1
                         agent_stats[task.assigned_agent]['total_score'] += task.score or 0
@@ -314,12 +421,40 @@ class TaskService:
                             'completed_tasks': 1,
                             'total_score': task.score or 0
                         }
+            columns = np.array(rows, dtype=_TASK_STATS_DTYPE)
             
-            top_agents = sorted(
+            # Calculate statistics
+            status_counts = np.bincount(columns['status'], minlength=len(_STATUS_INDEX))
+            available = int(status_counts[_STATUS_INDEX[TaskStatus.AVAILABLE]])
+            assigned = int(status_counts[_STATUS_INDEX[TaskStatus.ASSIGNED]])
+            completed = int(status_counts[_STATUS_INDEX[TaskStatus.COMPLETED]])
+            failed = int(status_counts[_STATUS_INDEX[TaskStatus.FAILED]])
+            cancelled = int(status_counts[_STATUS_INDEX[TaskStatus.CANCELLED]])
+            
+            # Calculate averages
+            avg_reward = float(columns['reward'].mean()) if page_size > 0 else 0
+            avg_complexity = float(columns['complexity'].mean()) if page_size > 0 else 0
+            
+            # Calculate completion time average over the completed tasks
+            if completed:
+                completed_mask = columns['status'] == _STATUS_INDEX[TaskStatus.COMPLETED]
+                avg_completion_time = float(columns['completion_minutes'][completed_mask].mean())
+            else:
+                avg_completion_time = None
+            
+            # Get recent tasks
+            recent_tasks = heapq.nlargest(
+                5,
+                tasks.tasks,
+                key=lambda t: t.created_at
+            )
+            
+            # Get top agents
+            top_agents = heapq.nlargest(
+                5,
                 agent_stats.values(),
-                key=lambda a: a['completed_tasks'],
-                reverse=True
-            )[:5]
+                key=lambda a: a['completed_tasks']
+            )
             
             # Add average score to top agents
             for agent in top_agents:
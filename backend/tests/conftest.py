@@ -0,0 +1,75 @@
+"""
+Shared fixtures for the backend tests.
+"""
+import uuid
+
+import pytest
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "mock: runs against a temporary database with IPFS and chain calls stubbed; safe to run in parallel (-n auto)"
+    )
+    config.addinivalue_line(
+        "markers", "integration: uses the shared chain and database, run serially (-n 0)"
+    )
+
+
+@pytest.fixture(scope="session")
+def web3_ready():
+    """Connect to the chain and load the contracts once per test session."""
+    from services import contract_service
+    
+    if not contract_service._INITIALIZED:
+        contract_service.init_web3()
+        contract_service.initialize_contracts()
+    return contract_service
+
+
+@pytest.fixture(autouse=True)
+def isolated_mock_services(request, tmp_path, monkeypatch):
+    """
+    Keep tests marked ``mock`` off shared state.
+    
+    Each test gets its own SQLite database under tmp_path, the IPFS upload
+    returns a generated CID, and no contract call reaches the chain.
+    """
+    if request.node.get_closest_marker("mock") is None:
+        yield
+        return
+    
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    
+    from models.collaboration import Base
+    from services import agent_collaboration_service as collaboration_module
+    from services import contract_service
+    from services.collaboration_db_service import collaboration_db_service
+    
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'collaboration.db'}",
+        connect_args={"check_same_thread": False}
+    )
+    Base.metadata.create_all(bind=engine)
+    monkeypatch.setattr(collaboration_db_service, "engine", engine)
+    monkeypatch.setattr(
+        collaboration_db_service,
+        "SessionLocal",
+        sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    )
+    monkeypatch.setattr(collaboration_db_service, "_events_cache", {})
+    
+    async def upload_json(data):
+        cid = "Qm" + uuid.uuid4().hex
+        return {"success": True, "cid": cid, "url": f"mock://{cid}", "mode": "mock"}
+    
+    def record_collaboration_ipfs(collaboration_id, ipfs_cid, task_id, sender_address):
+        return {"success": True, "transaction_hash": "0x" + uuid.uuid4().hex * 2}
+    
+    monkeypatch.setattr(collaboration_module.ipfs_service, "upload_json", upload_json)
+    monkeypatch.setattr(collaboration_module, "record_collaboration_ipfs", record_collaboration_ipfs)
+    # Learning events are only written to the chain when w3 is connected
+    monkeypatch.setattr(contract_service, "w3", None)
+    
+    yield
+    engine.dispose()
@@ -0,0 +1,130 @@
+"""
+Agent and task payloads shared by the collaboration tests.
+
+The agent tuples are never handed to the service directly: make_task copies
+every agent dict, so no test can leak changes into another.
+"""
+from collections import Counter
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+try:
+    import orjson
+    
+    def json_dumps(obj):
+        return orjson.dumps(obj).decode()
+except ImportError:
+    from json import dumps as json_dumps
+
+# Three agents, modelled on the agents assigned to a real collaborative task
+AGENTS_3 = (
+    {
+        "agent_id": "0xDE36D579646B6F567686b03Eb0C964dE6C7DE2F2",
+        "name": "Agent_7DE2F2",
+        "capabilities": ["text_generation", "data_analysis"],
+        "reputation": 85
+    },
+    {
+        "agent_id": "0xb026DD162B2Cb197A91cBb091A9E794Dbbd8eFC7",
+        "name": "Agent_8eFC7",
+        "capabilities": ["summarization", "sentiment_analysis"],
+        "reputation": 90
+    },
+    {
+        "agent_id": "0x9b7f0892faC0fD78098Dc23E69901BF83442334A",
+        "name": "Agent_334A",
+        "capabilities": ["translation", "text_generation"],
+        "reputation": 88
+    }
+)
+
+# Two minimal text-generation agents
+AGENTS_2 = (
+    {
+        "agent_id": "0xDEADBEEF1111111111111111111111111111111111",
+        "name": "TestAgent1",
+        "capabilities": ["text_generation"],
+        "reputation": 80
+    },
+    {
+        "agent_id": "0xDEADBEEF2222222222222222222222222222222222",
+        "name": "TestAgent2",
+        "capabilities": ["text_generation"],
+        "reputation": 85
+    }
+)
+
+
+def make_task(task_id, agents, **overrides):
+    """Build a fresh multi-agent task payload assigned to copies of ``agents``."""
+    task = {
+        "task_id": task_id,
+        "title": "Multi-Agent Test",
+        "description": "Multi-agent collaboration test task",
+        "required_capabilities": ["text_generation"],
+        "reward": 1.0,
+        "assigned_agents": [dict(agent) for agent in agents]
+    }
+    task.update(overrides)
+    return task
+
+
+def _normalize(text, lower):
+    return text.lower() if lower else text
+
+
+def _name_finder(names):
+    """Return a function yielding every occurrence of each name in a text.
+
+    Uses an Aho-Corasick automaton when pyahocorasick is installed, otherwise
+    str.count per name. Either way a name nested inside a longer name is
+    found for both, matching a plain substring check.
+    """
+    names = set(names)
+    if not names:
+        return lambda text: ()
+    if ahocorasick is None:
+        return lambda text: (name for name in names for _ in range(text.count(name)))
+    
+    automaton = ahocorasick.Automaton()
+    for name in names:
+        automaton.add_word(name, name)
+    automaton.make_automaton()
+    return lambda text: (name for _, name in automaton.iter(text))
+
+
+def count_mentions(conversation, names, lower=False):
+    """Count every occurrence of each name in the serialized conversation."""
+    find = _name_finder(_normalize(name, lower) for name in names if name)
+    return Counter(find(_normalize(json_dumps(conversation), lower)))
+
+
+def count_messages_mentioning(conversation, names):
+    """Count, for each name, the messages whose content contains it.
+
+    Same result as ``name in msg["content"]`` per message and name: nested
+    names count for both, and an empty name matches every message.
+    """
+    find = _name_finder(name for name in names if name)
+    message_counts = Counter()
+    for msg in conversation:
+        message_counts.update(set(find(msg.get("content", ""))))
+    if "" in names:
+        message_counts[""] = len(conversation)
+    return message_counts
+
+
+def unmentioned_names(conversation, names, lower=False):
+    """Return the names never mentioned in the conversation.
+
+    Stops at the first message by which every name has been seen.
+    """
+    unmentioned = {_normalize(name, lower) for name in names if name}
+    for msg in conversation:
+        if not unmentioned:
+            break
+        text = _normalize(json_dumps(msg), lower)
+        unmentioned.difference_update([name for name in unmentioned if name in text])
+    return unmentioned
@@ -2,10 +2,33 @@
 """
 测试agent统计信息更新的脚本
 """
-import requests
-import json
+import asyncio
+import httpx
+import pytest
+import ijson
 
-def test_agent_statistics():
+async def count_agent_events(client, agent_id):
+    """流式读取区块链事件列表，边接收边解析，只保留这个agent的事件"""
+    async with client.stream("GET", "/blockchain/events", params={"event_type": "LearningEventRecorded"}) as response:
+        if response.status_code != 200:
+            return response.status_code, 0, []
+        
+        total_events = 0
+        agent_events = []
+        parsed = ijson.sendable_list()
+        parser = ijson.items_coro(parsed, 'events.item')
+        async for chunk in response.aiter_bytes():
+            parser.send(chunk)
+            for event in parsed:
+                total_events += 1
+                if (event.get('data') or {}).get('agentAddress') == agent_id:
+                    agent_events.append(event)
+            del parsed[:]
+        parser.close()
+        return response.status_code, total_events, agent_events
+
+@pytest.mark.asyncio
+async def test_agent_statistics():
     """测试agent统计信息"""
     
     base_url = "http://localhost:8001"
@@ -16,8 +39,16 @@ def test_agent_statistics():
     print(f"🔍 Checking statistics for agent: {test_agent_id}")
     
     try:
+        # 三个请求互不依赖，并发发出；连接池保持keep-alive连接供复用
+        limits = httpx.Limits(max_connections=4, max_keepalive_connections=4)
+        async with httpx.AsyncClient(base_url=base_url, limits=limits) as client:
+            agent_response, learning_response, (events_status, total_events, agent_events) = await asyncio.gather(
+                client.get(f"/agents/{test_agent_id}"),
+                client.get(f"/agents/{test_agent_id}/learning"),
+                count_agent_events(client, test_agent_id)
+            )
+        
         # 获取agent信息
-        agent_response = requests.get(f"{base_url}/agents/{test_agent_id}")
         if agent_response.status_code == 200:
             agent_data = agent_response.json()
             print(f"📊 Current agent statistics:")
@@ -29,7 +60,6 @@ def test_agent_statistics():
             print(f"❌ Failed to get agent info: {agent_response.status_code}")
             
         # 获取agent学习历史
-        learning_response = requests.get(f"{base_url}/agents/{test_agent_id}/learning")
         if learning_response.status_code == 200:
             learning_data = learning_response.json()
             events = learning_data.get('events', [])
@@ -50,22 +80,17 @@ def test_agent_statistics():
             print(f"❌ Failed to get learning events: {learning_response.status_code}")
             
         # 检查区块链事件
-        events_response = requests.get(f"{base_url}/blockchain/events", params={"event_type": "LearningEventRecorded"})
-        if events_response.status_code == 200:
-            events_data = events_response.json()
-            print(f"\n🔗 Blockchain learning events: {len(events_data.get('events', []))} total")
-            
-            # 查找这个agent的事件
-            agent_events = [e for e in events_data.get('events', []) if e.get('data', {}).get('agentAddress') == test_agent_id]
+        if events_status == 200:
+            print(f"\n🔗 Blockchain learning events: {total_events} total")
             print(f"   Agent-specific events: {len(agent_events)}")
             
         else:
-            print(f"❌ Failed to get blockchain events: {events_response.status_code}")
+            print(f"❌ Failed to get blockchain events: {events_status}")
             
     except Exception as e:
         print(f"❌ Error during test: {str(e)}")
 
 if __name__ == "__main__":
     print("🚀 Testing agent statistics and learning events...")
-    test_agent_statistics()
+    asyncio.run(test_agent_statistics())
     print("✅ Test completed!")
\ No newline at end of file
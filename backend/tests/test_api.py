@@ -5,9 +5,38 @@ import pytest
 from fastapi.testclient import TestClient
 from backend.main import app
 
-client = TestClient(app)
+@pytest.fixture(scope="session")
+def client():
+    """Share one TestClient (and one app startup) across the session."""
+    with TestClient(app) as c:
+        yield c
 
-def test_health_endpoint():
+@pytest.fixture(scope="session")
+def sample_agent(client):
+    """Create one agent for the tests that only need an existing agent."""
+    agent_data = {
+        "name": "SpecificAgent",
+        "description": "A specific agent for testing",
+        "capabilities": ["data_analysis"],
+        "confidence_factor": 0.8,
+        "risk_tolerance": 0.5
+    }
+    return client.post("/agents/", json=agent_data).json()["agent_id"]
+
+@pytest.fixture(scope="session")
+def sample_task(client):
+    """Create one task for the tests that only need an existing task."""
+    task_data = {
+        "title": "Specific Task",
+        "description": "A specific task for testing",
+        "reward": 0.7,
+        "required_capabilities": ["text_generation"],
+        "deadline": "2023-09-20T00:00:00Z",
+        "complexity": "high"
+    }
+    return client.post("/tasks/", json=task_data).json()["task_id"]
+
+def test_health_endpoint(client):
     """Test the health endpoint returns correct status."""
     response = client.get("/health")
     assert response.status_code == 200
@@ -18,7 +47,7 @@ def test_health_endpoint():
     assert "api" in data["services"]
     assert "blockchain" in data["services"]
 
-def test_get_agents():
+def test_get_agents(client):
     """Test retrieving the list of agents."""
     response = client.get("/agents/")
     assert response.status_code == 200
@@ -29,7 +58,7 @@ def test_get_agents():
     assert "limit" in data
     assert "offset" in data
 
-def test_create_agent():
+def test_create_agent(client):
     """Test creating a new agent."""
     agent_data = {
         "name": "TestAgent",
@@ -45,7 +74,7 @@ def test_create_agent():
     assert "transaction_hash" in data
     assert "registration_date" in data
 
-def test_get_tasks():
+def test_get_tasks(client):
     """Test retrieving the list of tasks."""
     response = client.get("/tasks/")
     assert response.status_code == 200
@@ -56,7 +85,7 @@ def test_get_tasks():
     assert "limit" in data
     assert "offset" in data
 
-def test_create_task():
+def test_create_task(client):
     """Test creating a new task."""
     task_data = {
         "title": "Test Task",
@@ -73,7 +102,7 @@ def test_create_task():
     assert "transaction_hash" in data
     assert "created_at" in data
 
-def test_get_learning_events():
+def test_get_learning_events(client):
     """Test retrieving learning events."""
     response = client.get("/learning/")
     assert response.status_code == 200
@@ -84,7 +113,7 @@ def test_get_learning_events():
     assert "limit" in data
     assert "offset" in data
 
-def test_create_learning_event():
+def test_create_learning_event(client):
     """Test creating a new learning event."""
     event_data = {
         "agent_id": "0x1234567890123456789012345678901234567890",
@@ -102,65 +131,31 @@ def test_create_learning_event():
     assert "transaction_hash" in data
     assert "timestamp" in data
 
-def test_get_agent_by_id():
+def test_get_agent_by_id(client, sample_agent):
     """Test retrieving a specific agent by ID."""
-    # First, create an agent
-    agent_data = {
-        "name": "SpecificAgent",
-        "description": "A specific agent for testing",
-        "capabilities": ["data_analysis"],
-        "confidence_factor": 0.8,
-        "risk_tolerance": 0.5
-    }
-    create_response = client.post("/agents/", json=agent_data)
-    agent_id = create_response.json()["agent_id"]
-    
-    # Then, retrieve the agent
-    response = client.get(f"/agents/{agent_id}")
+    response = client.get(f"/agents/{sample_agent}")
     assert response.status_code == 200
     data = response.json()
     assert "agent_id" in data
-    assert data["agent_id"] == agent_id
+    assert data["agent_id"] == sample_agent
     assert "name" in data
     assert "capabilities" in data
     assert isinstance(data["capabilities"], list)
 
-def test_get_task_by_id():
+def test_get_task_by_id(client, sample_task):
     """Test retrieving a specific task by ID."""
-    # First, create a task
-    task_data = {
-        "title": "Specific Task",
-        "description": "A specific task for testing",
-        "reward": 0.7,
-        "required_capabilities": ["text_generation"],
-        "deadline": "2023-09-20T00:00:00Z",
-        "complexity": "high"
-    }
-    create_response = client.post("/tasks/", json=task_data)
-    task_id = create_response.json()["task_id"]
-    
-    # Then, retrieve the task
-    response = client.get(f"/tasks/{task_id}")
+    response = client.get(f"/tasks/{sample_task}")
     assert response.status_code == 200
     data = response.json()
     assert "task_id" in data
-    assert data["task_id"] == task_id
+    assert data["task_id"] == sample_task
     assert "title" in data
     assert "status" in data
     assert "reward" in data
 
-def test_assign_task():
+def test_assign_task(client, sample_agent):
     """Test assigning a task to an agent."""
-    # Create an agent
-    agent_data = {
-        "name": "AssignmentAgent",
-        "description": "An agent for task assignment testing",
-        "capabilities": ["data_analysis"],
-        "confidence_factor": 0.9,
-        "risk_tolerance": 0.4
-    }
-    agent_response = client.post("/agents/", json=agent_data)
-    agent_id = agent_response.json()["agent_id"]
+    agent_id = sample_agent
     
     # Create a task
     task_data = {
@@ -194,18 +189,9 @@ def test_assign_task():
     assert "assigned_agent" in task_data
     assert task_data["assigned_agent"] == agent_id
 
-def test_complete_task():
+def test_complete_task(client, sample_agent):
     """Test marking a task as completed."""
-    # Create an agent
-    agent_data = {
-        "name": "CompletionAgent",
-        "description": "An agent for task completion testing",
-        "capabilities": ["data_analysis"],
-        "confidence_factor": 0.85,
-        "risk_tolerance": 0.5
-    }
-    agent_response = client.post("/agents/", json=agent_data)
-    agent_id = agent_response.json()["agent_id"]
+    agent_id = sample_agent
     
     # Create a task
     task_data = {
@@ -0,0 +1,121 @@
+"""
+Tests for multi-agent collaboration runs.
+
+Covers the task payloads exercised by the standalone collaboration scripts
+(test_collaboration_direct, test_multi_agent_fix, test_quick_fix_verification
+and test_final_fix) in one module, sharing one event loop and one service.
+"""
+import asyncio
+import pytest
+
+from services.agent_collaboration_service import AgentCollaborationService
+from tests.fixtures.agents import AGENTS_2, AGENTS_3, make_task
+
+pytestmark = pytest.mark.mock
+
+DIRECT_AGENTS = [
+    {
+        "agent_id": "0x1111111111111111111111111111111111111111",
+        "name": "DataAnalysisExpert",
+        "capabilities": ["data_analysis", "classification"],
+        "reputation": 85
+    },
+    {
+        "agent_id": "0x2222222222222222222222222222222222222222",
+        "name": "CodeGenerationMaster",
+        "capabilities": ["code_generation", "text_generation"],
+        "reputation": 92
+    },
+    {
+        "agent_id": "0x3333333333333333333333333333333333333333",
+        "name": "NLPSpecialist",
+        "capabilities": ["sentiment_analysis", "text_generation", "summarization"],
+        "reputation": 88
+    },
+    {
+        "agent_id": "0x4444444444444444444444444444444444444444",
+        "name": "TranslationExpert",
+        "capabilities": ["translation", "text_generation"],
+        "reputation": 90
+    }
+]
+
+FINAL_FIX_AGENTS = [
+    "0xFirst0000000000000000000000000000000000001",
+    "0xSecond000000000000000000000000000000000002",
+    "0xThird0000000000000000000000000000000000003"
+]
+
+TASK_PAYLOADS = {
+    "direct": {
+        "task_id": "test_task_123",
+        "title": "Complete Content Generation Pipeline",
+        "description": "Create a comprehensive content generation system that includes research, writing, editing, and review phases.",
+        "type": "content_generation",
+        "required_capabilities": ["text_generation", "data_analysis", "classification"],
+        "assigned_agents": DIRECT_AGENTS
+    },
+    "multi_agent_fix": make_task(
+        "test_multi_agent_collaboration_fix_12345",
+        AGENTS_3,
+        title="Multi-Agent Collaboration Fix Test",
+        description="This task tests whether all assigned agents participate in task execution",
+        required_capabilities=["text_generation", "summarization"],
+        reward=2.5
+    ),
+    "quick_fix": make_task(
+        "quick_test_12345",
+        AGENTS_2,
+        title="Quick Multi-Agent Test",
+        description="Quick test for collaboration fix"
+    ),
+    "final_fix": {
+        "task_id": "final_test_12345",
+        "title": "Final Multi-Agent Test",
+        "description": "Multi-agent task that has both assigned_agent and assigned_agents set",
+        "required_capabilities": ["text_generation", "analysis"],
+        "reward": 3.0,
+        "assigned_agent": FINAL_FIX_AGENTS[0],
+        "assigned_agents": FINAL_FIX_AGENTS
+    }
+}
+
+
+def _agent_id(agent):
+    return agent["agent_id"] if isinstance(agent, dict) else agent
+
+
+@pytest.fixture(scope="module")
+def event_loop():
+    """Run all tests in this module on one event loop."""
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture(scope="module")
+def collab_service():
+    """One collaboration service in mock mode, so no LLM requests are made."""
+    return AgentCollaborationService(mock_mode=True)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("payload_name", sorted(TASK_PAYLOADS))
+async def test_collaboration_keeps_all_assigned_agents(collab_service, payload_name):
+    task_data = dict(TASK_PAYLOADS[payload_name])
+    
+    # Create and run the collaboration
+    collaboration_id = await collab_service.create_collaboration(
+        task_id=task_data["task_id"],
+        task_data=task_data
+    )
+    result = await collab_service.run_collaboration(
+        collaboration_id=collaboration_id,
+        task_data=task_data
+    )
+    
+    # Every assigned agent takes part, and no other agent does
+    assigned_ids = frozenset(_agent_id(agent) for agent in task_data["assigned_agents"])
+    result_ids = frozenset(agent.get("agent_id") for agent in result.get("agents", []))
+    assert result_ids == assigned_ids
+    assert result.get("conversation")
@@ -5,11 +5,22 @@ Test complete workflow: create task -> complete task -> evaluate task
 """
 
 import asyncio
+import functools
+import logging
 import sys
 import os
-import requests
+import aiohttp
 import time
-import json
+from collections import Counter
+try:
+    import orjson
+    
+    def json_dumps(obj):
+        return orjson.dumps(obj).decode()
+    
+    json_loads = orjson.loads
+except ImportError:
+    from json import dumps as json_dumps, loads as json_loads
 
 # 添加项目根目录到Python路径
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -17,17 +28,41 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from services import contract_service
 from services.collaboration_db_service import collaboration_db_service
 
+logger = logging.getLogger(__name__)
+
+@functools.lru_cache(maxsize=1)
+def _sender():
+    """初始化区块链连接并缓存发送者地址，后续调用不再发RPC请求"""
+    contract_service.init_web3()
+    contract_service.initialize_contracts()
+    accounts = contract_service.w3.eth.accounts
+    return accounts[0] if accounts else None
+
+async def _wait_for(predicate, timeout=10, interval=0.1):
+    """轮询predicate直到返回真值或超时，不阻塞事件循环"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        await asyncio.sleep(interval)
+    return False
+
 async def test_complete_workflow():
     print('🧪 测试完整的任务工作流和task_id修复...')
     
+    # 整个测试共用一个ClientSession（连接池），每个请求单独设置超时
+    async with aiohttp.ClientSession(
+        timeout=aiohttp.ClientTimeout(total=30),
+        json_serialize=json_dumps
+    ) as session:
+        await run_complete_workflow(session)
+
+async def run_complete_workflow(session):
     try:
         # 1. 初始化区块链连接
         print('\n🔗 初始化区块链连接...')
-        contract_service.init_web3()
-        contract_service.initialize_contracts()
-        
-        # 2. 获取发送者地址
-        sender_address = contract_service.w3.eth.accounts[0] if contract_service.w3.eth.accounts else None
+        # 2. 获取发送者地址（连接、合约实例和账户只初始化一次）
+        sender_address = _sender()
         if not sender_address:
             print('❌ 无法获取发送者地址')
             return
@@ -75,7 +110,7 @@ async def test_complete_workflow():
         
         complete_result = contract_service.complete_task(
             task_id, 
-            json.dumps(completion_result), 
+            json_dumps(completion_result), 
             sender_address
         )
         
@@ -85,8 +120,9 @@ async def test_complete_workflow():
             print(f'❌ 任务完成失败: {complete_result}')
             return
         
-        # 等待区块链状态更新
-        time.sleep(3)
+        # 等待区块链状态更新（任务变为completed即继续）
+        if not await _wait_for(lambda: contract_service.get_task(task_id).get('status') == 'completed', timeout=5):
+            print('⚠️ 等待任务完成状态超时，继续评价')
         
         # 6. 评价任务
         print(f'\n📊 评价任务 {task_id}...')
@@ -99,16 +135,16 @@ async def test_complete_workflow():
         }
         
         try:
-            eval_response = requests.post(
+            eval_response = await session.post(
                 f'http://localhost:8001/tasks/{task_id}/evaluate',
                 json=evaluation_data,
-                timeout=30
+                timeout=aiohttp.ClientTimeout(total=30)
             )
             
-            print(f'评价响应状态: {eval_response.status_code}')
+            print(f'评价响应状态: {eval_response.status}')
             
-            if eval_response.status_code == 200:
-                eval_result = eval_response.json()
+            if eval_response.status == 200:
+                eval_result = await eval_response.json(loads=json_loads)
                 print('✅ 任务评价成功!')
                 
                 data = eval_result.get('data', {})
@@ -117,43 +153,77 @@ async def test_complete_workflow():
                 
                 # 7. 等待事件处理
                 print('\n⏳ 等待评价事件处理...')
-                time.sleep(5)
+                if not await _wait_for(
+                    lambda: len(collaboration_db_service.get_blockchain_events(
+                        event_type='task_evaluation',
+                        task_id=task_id,
+                        limit=1
+                    )) >= 1,
+                    timeout=8
+                ):
+                    print('⚠️ 等待评价事件超时')
                 
-                # 8. 检查数据库中的评价事件
+                # 8. 检查数据库中的评价事件，同时请求任务历史API（两者互不依赖）
                 print('\n🔍 检查数据库中的评价事件...')
                 
-                # 检查特定任务的评价事件
-                task_events = collaboration_db_service.get_blockchain_events(
-                    event_type='task_evaluation',
-                    task_id=task_id,
-                    limit=10
+                # 同步的数据库查询放到线程池中执行，与HTTP请求并发
+                loop = asyncio.get_running_loop()
+                task_events, history_response = await asyncio.gather(
+                    loop.run_in_executor(None, functools.partial(
+                        collaboration_db_service.get_blockchain_events,
+                        event_type='task_evaluation',
+                        task_id=task_id,
+                        limit=10
+                    )),
+                    session.get(
+                        f'http://localhost:8001/tasks/{task_id}/history',
+                        timeout=aiohttp.ClientTimeout(total=10)
+                    ),
+                    return_exceptions=True
                 )
+                if isinstance(task_events, Exception):
+                    raise task_events
                 
                 print(f'任务 {task_id} 的评价事件: {len(task_events)} 个')
                 
                 if task_events:
                     print('✅ 修复成功! 评价事件现在包含正确的task_id!')
-                    for i, event in enumerate(task_events):
-                        task_id_db = event.get('task_id')
-                        agent_id = event.get('agent_id', 'N/A')
-                        timestamp = event.get('timestamp', 'N/A')
-                        
-                        print(f'  事件 {i+1}:')
-                        print(f'    Task ID: {task_id_db}')
-                        print(f'    Agent ID: {agent_id}')
-                        print(f'    时间: {timestamp}')
-                        print(f'    状态: {"✅ 已修复" if task_id_db and task_id_db != "None" else "❌ 未修复"}')
-                        print()
+                    
+                    # 一次遍历统计(task_id, agent_id)，找出重复记录的评价事件
+                    pair_counts = Counter((e.get('task_id'), e.get('agent_id')) for e in task_events)
+                    duplicates = {pair: count for pair, count in pair_counts.items() if count > 1}
+                    missing_task_id = [e for e in task_events if not e.get('task_id') or e.get('task_id') == 'None']
+                    
+                    if not duplicates and not missing_task_id:
+                        print(f'✅ {len(task_events)} 个评价事件均包含task_id，且没有重复')
+                    else:
+                        if duplicates:
+                            print(f'⚠️ 发现重复的评价事件: {duplicates}')
+                        # 只有出现问题时才逐条输出事件详情
+                        lines = []
+                        for i, event in enumerate(task_events):
+                            task_id_db = event.get('task_id')
+                            agent_id = event.get('agent_id', 'N/A')
+                            timestamp = event.get('timestamp', 'N/A')
+                            
+                            lines.append(f'  事件 {i+1}:')
+                            lines.append(f'    Task ID: {task_id_db}')
+                            lines.append(f'    Agent ID: {agent_id}')
+                            lines.append(f'    时间: {timestamp}')
+                            lines.append(f'    状态: {"✅ 已修复" if task_id_db and task_id_db != "None" else "❌ 未修复"}')
+                            lines.append('')
+                        print('\n'.join(lines))
                 else:
                     print('❌ 未找到该任务的评价事件')
                 
                 # 9. 测试任务历史API
                 print(f'\n📈 测试任务历史 {task_id}...')
                 try:
-                    history_response = requests.get(f'http://localhost:8001/tasks/{task_id}/history', timeout=10)
+                    if isinstance(history_response, Exception):
+                        raise history_response
                     
-                    if history_response.status_code == 200:
-                        history_data = history_response.json()
+                    if history_response.status == 200:
+                        history_data = await history_response.json(loads=json_loads)
                         history_events = history_data.get('data', {}).get('history', [])
                         eval_events = [e for e in history_events if e.get('event') == 'evaluated']
                         
@@ -162,37 +232,41 @@ async def test_complete_workflow():
                         
                         if eval_events:
                             print('🎉 最终验证成功! 评价事件正确出现在任务历史中!')
+                            lines = []
                             for i, eval_event in enumerate(eval_events):
                                 details = eval_event.get('details', 'No details')
                                 eval_data = eval_event.get('evaluation_data', {})
                                 total_agents = eval_data.get('total_agents', 'N/A')
                                 rating = eval_data.get('rating', 'N/A')
                                 
-                                print(f'  评价 {i+1}: {details}')
-                                print(f'            评分: {rating}/5, 影响: {total_agents} 个agent')
+                                lines.append(f'  评价 {i+1}: {details}')
+                                lines.append(f'            评分: {rating}/5, 影响: {total_agents} 个agent')
                                 
                                 # 验证去重功能
                                 if len(eval_events) == 1:
-                                    print('✅ 评价事件去重功能正常工作!')
+                                    lines.append('✅ 评价事件去重功能正常工作!')
                                 else:
-                                    print(f'⚠️ 发现 {len(eval_events)} 个评价事件，可能去重功能有问题')
+                                    lines.append(f'⚠️ 发现 {len(eval_events)} 个评价事件，可能去重功能有问题')
+                            print('\n'.join(lines))
                         else:
                             print('❌ 评价事件仍未出现在任务历史中')
                             
-                        print(f'\n📜 完整任务历史:')
+                        lines = [f'\n📜 完整任务历史:']
                         for i, event in enumerate(history_events):
                             event_type = event.get('event', 'unknown')
                             timestamp = event.get('timestamp', 'N/A')
                             details = event.get('details', 'No details')
-                            print(f'  {i+1}. [{event_type}] {timestamp} - {details}')
+                            lines.append(f'  {i+1}. [{event_type}] {timestamp} - {details}')
+                        print('\n'.join(lines))
                     else:
-                        print(f'❌ 获取任务历史失败: {history_response.status_code}')
+                        history_response.release()
+                        print(f'❌ 获取任务历史失败: {history_response.status}')
                         
                 except Exception as e:
                     print(f'❌ 任务历史API请求失败: {e}')
                 
             else:
-                print(f'❌ 评价失败: {eval_response.status_code} - {eval_response.text}')
+                print(f'❌ 评价失败: {eval_response.status} - {await eval_response.text()}')
                 
         except Exception as e:
             print(f'❌ 评价请求失败: {e}')
@@ -205,9 +279,8 @@ async def test_complete_workflow():
         print('✅ 任务历史显示功能已验证')
         
     except Exception as e:
-        print(f'❌ 测试过程中出错: {e}')
-        import traceback
-        traceback.print_exc()
+        # 由logging延迟格式化异常和堆栈，只输出一次
+        logger.exception('❌ 测试过程中出错: %s', e)
 
 if __name__ == "__main__":
     print("🚀 开始完整工作流测试...")
@@ -5,11 +5,16 @@ Test script to verify task history evaluation event deduplication
 """
 
 import asyncio
+import hashlib
+import importlib
 import sys
 import os
 import json
 import time
 from datetime import datetime
+from unittest.mock import patch
+
+import pytest
 
 # 添加项目根目录到Python路径
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -18,7 +23,20 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from services.collaboration_db_service import collaboration_db_service
 from routers.tasks import get_task_history
 
-async def test_evaluation_deduplication():
+# routers包把tasks重新绑定为APIRouter，需要直接取模块对象来替换mock_tasks
+tasks_module = importlib.import_module('routers.tasks')
+
+@pytest.fixture
+def isolated_mock_tasks(monkeypatch):
+    """
+    为每个测试提供独立的mock_tasks列表，测试结束后自动恢复模块状态
+    """
+    tasks = []
+    monkeypatch.setattr(tasks_module, 'mock_tasks', tasks)
+    yield tasks
+
+@pytest.mark.asyncio
+async def test_evaluation_deduplication(isolated_mock_tasks):
     """
     测试任务历史中评价事件的去重功能
     """
@@ -31,8 +49,18 @@ async def test_evaluation_deduplication():
     # 1. 创建多个相同任务的评价事件（模拟重复评价问题）
     print("\n📝 Creating multiple evaluation events for the same task...")
     
+    event_count = 3
+    # 循环不变量提到循环外：基准时间戳只取一次，交易哈希一次性生成
+    base_ts = time.time()
+    task_id_bytes = test_task_id.encode()
+    tx_hashes = [
+        "0x" + hashlib.blake2b(task_id_bytes + i.to_bytes(4, 'big'), digest_size=16).hexdigest()
+        for i in range(event_count)
+    ]
+    
     evaluation_events = []
-    for i in range(3):
+    db_events = []
+    for i in range(event_count):
         agent_id = f"agent_{i+1}_test"
         event_data = {
             "task_id": test_task_id,
@@ -41,17 +69,17 @@ async def test_evaluation_deduplication():
             "success": True,
             "reputation_change": 5,
             "reward": 10.0,
-            "timestamp": time.time() + i  # 稍微不同的时间戳
+            "timestamp": base_ts + i  # 稍微不同的时间戳
         }
         
-        # 记录评价事件到数据库（直接使用record_blockchain_event，它设置了task_id）
-        collaboration_db_service.record_blockchain_event(
-            event_type="task_evaluation",
-            task_id=test_task_id,
-            event_data=event_data,
-            transaction_hash=f"0x{abs(hash(f'{test_task_id}_{i}')):#x}",
-            block_number=1000000 + i
-        )
+        # 收集评价事件，循环结束后一次性写入数据库（事件都设置了task_id）
+        db_events.append({
+            "event_type": "task_evaluation",
+            "task_id": test_task_id,
+            "event_data": event_data,
+            "transaction_hash": tx_hashes[i],
+            "block_number": 1000000 + i
+        })
         
         evaluation_events.append({
             "agent_id": agent_id,
@@ -59,6 +87,9 @@ async def test_evaluation_deduplication():
         })
         print(f"  ✅ Created evaluation event {i+1} for agent {agent_id}")
     
+    # 单个事务批量插入，只提交一次
+    collaboration_db_service.record_blockchain_events_bulk(db_events)
+    
     print(f"\n📊 Created {len(evaluation_events)} evaluation events in database")
     
     # 2. 验证事件是否真的被存储了
@@ -70,8 +101,11 @@ async def test_evaluation_deduplication():
             limit=10
         )
         print(f"📊 Found {len(stored_events)} evaluation events for task {test_task_id} in database")
-        for i, event in enumerate(stored_events):
-            print(f"  Event {i+1}: task_id={event.get('task_id')}, agent_id={event.get('agent_id')}")
+        if stored_events:
+            print("\n".join(
+                f"  Event {i+1}: task_id={event.get('task_id')}, agent_id={event.get('agent_id')}"
+                for i, event in enumerate(stored_events)
+            ))
     except Exception as e:
         print(f"❌ Error checking stored events: {e}")
     
@@ -79,9 +113,8 @@ async def test_evaluation_deduplication():
     print("\n🔍 Retrieving task history to check deduplication...")
     
     try:
-        # 模拟任务存在（添加到mock数据中）
-        from routers.tasks import mock_tasks
-        mock_tasks.append({
+        # 模拟任务存在（添加到本测试独立的mock数据中）
+        isolated_mock_tasks.append({
             "task_id": test_task_id,
             "title": "Test Task for Evaluation Deduplication",
             "status": "completed",
@@ -98,9 +131,10 @@ async def test_evaluation_deduplication():
         print(f"📈 Task history retrieved: {len(history_events)} total events")
         print(f"📄 Full history result keys: {list(history_result.keys())}")
         if history_events:
-            print("📄 History details:")
-            for i, event in enumerate(history_events):
-                print(f"  {i+1}. {event}")
+            # 先拼接所有行再一次性输出
+            print("\n".join(["📄 History details:"] + [
+                f"  {i+1}. {event}" for i, event in enumerate(history_events)
+            ]))
         
         # 检查评价事件数量
         evaluation_events_in_history = [
@@ -139,9 +173,10 @@ async def test_evaluation_deduplication():
                 print(f"   Event {i+1}: {event.get('details', 'No details')}")
         
         # 显示完整的任务历史
-        print(f"\n📜 Complete task history for {test_task_id}:")
-        for i, event in enumerate(history_events):
-            print(f"  {i+1}. [{event.get('event', 'unknown')}] {event.get('timestamp', 'N/A')} - {event.get('details', 'No details')}")
+        print("\n".join([f"\n📜 Complete task history for {test_task_id}:"] + [
+            f"  {i+1}. [{event.get('event', 'unknown')}] {event.get('timestamp', 'N/A')} - {event.get('details', 'No details')}"
+            for i, event in enumerate(history_events)
+        ]))
     
     except Exception as e:
         print(f"❌ Error getting task history: {e}")
@@ -151,8 +186,7 @@ async def test_evaluation_deduplication():
     # 3. 清理测试数据
     print(f"\n🧹 Cleaning up test data...")
     try:
-        # 从mock_tasks中移除测试任务
-        mock_tasks[:] = [task for task in mock_tasks if task.get('task_id') != test_task_id]
+        # mock_tasks由fixture隔离，测试结束后自动恢复，无需手动移除
         
         # 清理数据库中的测试事件
         # 注意：这里假设有清理方法，如果没有则保留测试数据
@@ -162,5 +196,7 @@ async def test_evaluation_deduplication():
 
 if __name__ == "__main__":
     print("🚀 Starting task history evaluation deduplication test...")
-    asyncio.run(test_evaluation_deduplication())
+    # 直接运行脚本时没有pytest fixture，手动替换mock_tasks
+    with patch.object(tasks_module, 'mock_tasks', []) as mock_tasks:
+        asyncio.run(test_evaluation_deduplication(mock_tasks))
     print("\n🏁 Test completed!")
\ No newline at end of file
@@ -4,6 +4,7 @@
 """
 
 import asyncio
+import logging
 import sys
 import os
 
@@ -11,12 +12,26 @@ import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from services.agent_collaboration_service import AgentCollaborationService
+from tests.fixtures.agents import count_messages_mentioning
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# 测试任务分配的agents（任务数据是固定的，期望的ID集合在模块加载时算好）
+ASSIGNED_AGENTS = (
+    "0xFirst0000000000000000000000000000000000001",
+    "0xSecond000000000000000000000000000000000002",
+    "0xThird0000000000000000000000000000000000003"
+)
+EXPECTED_AGENT_IDS = frozenset(ASSIGNED_AGENTS)
 
 async def test_final_multi_agent_fix():
-    print('🎯 测试最终的多agent协作修复...')
+    logger.info('🎯 测试最终的多agent协作修复...')
     
     # Initialize collaboration service
     collaboration_service = AgentCollaborationService()
+    # 提前建立LLM连接，第一次agent调用不再承担冷启动开销
+    await collaboration_service.warmup()
     
     # 测试数据：模拟区块链任务数据结构
     task_data = {
@@ -27,126 +42,129 @@ async def test_final_multi_agent_fix():
         "reward": 3.0,
         # 模拟区块链任务数据结构（同时有单个和列表）
         "assigned_agent": "0xFirst0000000000000000000000000000000000001",  # 单个分配
-        "assigned_agents": [  # 多个分配（应该优先使用这个）
-            "0xFirst0000000000000000000000000000000000001",
-            "0xSecond000000000000000000000000000000000002", 
-            "0xThird0000000000000000000000000000000000003"
-        ]
+        "assigned_agents": list(ASSIGNED_AGENTS)  # 多个分配（应该优先使用这个）
     }
     
-    print(f'📋 测试数据:')
-    print(f'   assigned_agent: {task_data["assigned_agent"]}')
-    print(f'   assigned_agents: {task_data["assigned_agents"]} (共{len(task_data["assigned_agents"])}个)')
+    logger.info(f'📋 测试数据:')
+    logger.info(f'   assigned_agent: {task_data["assigned_agent"]}')
+    logger.info(f'   assigned_agents: {task_data["assigned_agents"]} (共{len(task_data["assigned_agents"])}个)')
     
     try:
         # 测试协作创建
-        print('\n🚀 创建协作...')
+        logger.info('\n🚀 创建协作...')
         collaboration_id = await collaboration_service.create_collaboration(
             task_id=task_data["task_id"],
             task_data=task_data
         )
         
-        print(f'✅ 协作已创建: {collaboration_id}')
+        logger.info(f'✅ 协作已创建: {collaboration_id}')
         
         # 测试协作执行
-        print('🚀 执行协作...')
+        logger.info('🚀 执行协作...')
         result = await collaboration_service.run_collaboration(
             collaboration_id=collaboration_id,
             task_data=task_data
         )
         
         # 分析结果
-        print('\n📊 结果分析:')
+        logger.info('\n📊 结果分析:')
         
         result_agents = result.get("agents", [])
         assigned_agents = task_data["assigned_agents"]
+        # 期望的ID集合是模块级常量，结果ID集合只算一次供后续所有检查复用
+        assigned_set = EXPECTED_AGENT_IDS
+        result_set = frozenset(agent.get("agent_id") for agent in result_agents)
         
-        print(f'   分配的agents: {len(assigned_agents)} 个')
-        print(f'   结果中的agents: {len(result_agents)} 个')
+        logger.info(f'   分配的agents: {len(assigned_agents)} 个')
+        logger.info(f'   结果中的agents: {len(result_agents)} 个')
         
         # 检查agent详情
-        print(f'\n👥 结果中的agents详情:')
+        logger.info(f'\n👥 结果中的agents详情:')
         for i, agent in enumerate(result_agents):
             agent_id = agent.get("agent_id", "N/A")
             agent_name = agent.get("name", "N/A")
             capabilities = agent.get("capabilities", [])
-            print(f'   Agent {i+1}: {agent_name} ({agent_id[:12]}...)')
-            print(f'             能力: {capabilities}')
+            logger.info(f'   Agent {i+1}: {agent_name} ({agent_id[:12]}...)')
+            logger.info(f'             能力: {capabilities}')
         
         # 验证修复结果
         if len(result_agents) == len(assigned_agents):
-            print(f'\n🎉 修复成功！')
-            print(f'✅ 所有 {len(assigned_agents)} 个分配的agents都出现在结果中')
-            print(f'✅ 多agent协作优先级逻辑正常工作')
+            logger.info(f'\n🎉 修复成功！')
+            logger.info(f'✅ 所有 {len(assigned_agents)} 个分配的agents都出现在结果中')
+            logger.info(f'✅ 多agent协作优先级逻辑正常工作')
             
             # 验证agent ID匹配
-            result_ids = {agent["agent_id"] for agent in result_agents}
-            assigned_ids = set(assigned_agents)
-            
-            if result_ids == assigned_ids:
-                print(f'✅ Agent ID完全匹配')
+            if result_set == assigned_set:
+                logger.info(f'✅ Agent ID完全匹配')
             else:
-                print(f'⚠️ Agent ID部分匹配:')
-                print(f'   分配: {assigned_ids}')
-                print(f'   结果: {result_ids}')
+                logger.info(f'⚠️ Agent ID部分匹配:')
+                logger.info(f'   缺少: {set(assigned_set - result_set)}')
+                logger.info(f'   多出: {set(result_set - assigned_set)}')
         else:
-            print(f'\n❌ 仍有问题')
-            print(f'   期望: {len(assigned_agents)} 个agents')
-            print(f'   实际: {len(result_agents)} 个agents')
+            logger.info(f'\n❌ 仍有问题')
+            logger.info(f'   期望: {len(assigned_agents)} 个agents')
+            logger.info(f'   实际: {len(result_agents)} 个agents')
         
         # 检查对话记录
         conversation = result.get("conversation", [])
-        print(f'\n💬 对话分析:')
-        print(f'   总消息数: {len(conversation)}')
+        logger.info(f'\n💬 对话分析:')
+        logger.info(f'   总消息数: {len(conversation)}')
         
-        # 统计每个agent在对话中的参与
-        agent_mentions = {}
-        for agent in result_agents:
-            agent_name = agent.get("name", "")
-            mentions = sum(1 for msg in conversation if agent_name in msg.get("content", ""))
-            agent_mentions[agent_name] = mentions
+        # 统计每个agent在对话中被提及的消息数
+        agent_names = [agent.get("name", "") for agent in result_agents]
+        agent_mentions = count_messages_mentioning(conversation, agent_names)
         
-        for agent_name, mentions in agent_mentions.items():
-            print(f'   {agent_name}: {mentions} 次提及')
+        for agent_name in dict.fromkeys(agent_names):
+            logger.info(f'   {agent_name}: {agent_mentions[agent_name]} 次提及')
         
         # IPFS存储验证
         ipfs_cid = result.get("ipfs_cid", "N/A")
-        print(f'\n💾 IPFS存储:')
-        print(f'   CID: {ipfs_cid}')
+        logger.info(f'\n💾 IPFS存储:')
+        logger.info(f'   CID: {ipfs_cid}')
         
-        if ipfs_cid != "N/A":
-            # 尝试验证IPFS中的数据
+        if ipfs_cid != "N/A" and os.getenv('DEEP_VERIFY'):
+            # 深度验证：重新从IPFS获取数据核对（需设置DEEP_VERIFY环境变量）
             try:
-                import requests
-                ipfs_response = requests.get(f'http://localhost:8001/collaboration/ipfs/{ipfs_cid}', timeout=5)
-                if ipfs_response.status_code == 200:
-                    ipfs_data = ipfs_response.json()
-                    ipfs_agents = ipfs_data.get("agents", [])
-                    print(f'   IPFS中的agents: {len(ipfs_agents)} 个')
-                    
-                    if len(ipfs_agents) == len(assigned_agents):
-                        print(f'   ✅ IPFS存储正确包含所有agents')
-                    else:
-                        print(f'   ❌ IPFS存储agents数量不匹配')
-                else:
-                    print(f'   ⚠️ 无法获取IPFS数据 (状态码: {ipfs_response.status_code})')
+                import aiohttp
+                async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=5)) as session:
+                    async with session.get(f'http://localhost:8001/collaboration/ipfs/{ipfs_cid}') as ipfs_response:
+                        if ipfs_response.status == 200:
+                            ipfs_data = await ipfs_response.json()
+                            ipfs_agents = ipfs_data.get("agents", [])
+                            logger.info(f'   IPFS中的agents: {len(ipfs_agents)} 个')
+                            
+                            if len(ipfs_agents) == len(assigned_agents):
+                                logger.info(f'   ✅ IPFS存储正确包含所有agents')
+                            else:
+                                logger.info(f'   ❌ IPFS存储agents数量不匹配')
+                        else:
+                            logger.info(f'   ⚠️ 无法获取IPFS数据 (状态码: {ipfs_response.status})')
             except Exception as e:
-                print(f'   ⚠️ IPFS验证失败: {e}')
+                logger.info(f'   ⚠️ IPFS验证失败: {e}')
+        elif ipfs_cid != "N/A":
+            # 未从IPFS重新获取，只核对run_collaboration返回的结果（设置DEEP_VERIFY可验证存储内容）
+            if result_set == EXPECTED_AGENT_IDS:
+                logger.info(f'   ✅ 返回的结果包含所有分配的agents')
+            else:
+                logger.info(f'   ❌ 返回结果中的agents与分配的agents不一致')
         
-        print(f'\n🏁 最终评估:')
+        logger.info(f'\n🏁 最终评估:')
         if len(result_agents) == len(assigned_agents):
-            print(f'🎉 多agent协作问题已完全修复！')
-            print(f'   - 条件判断优先级已正确修改')
-            print(f'   - 多agent任务不再被误识别为单agent任务')
-            print(f'   - 所有分配的agents都正确参与协作')
-            print(f'   - 结果展示将包含所有参与agents的对话记录')
+            logger.info(f'🎉 多agent协作问题已完全修复！')
+            logger.info(f'   - 条件判断优先级已正确修改')
+            logger.info(f'   - 多agent任务不再被误识别为单agent任务')
+            logger.info(f'   - 所有分配的agents都正确参与协作')
+            logger.info(f'   - 结果展示将包含所有参与agents的对话记录')
         else:
-            print(f'❌ 仍需进一步调试')
+            logger.info(f'❌ 仍需进一步调试')
             
     except Exception as e:
-        print(f'❌ 测试失败: {e}')
-        import traceback
-        traceback.print_exc()
+        # 由logging延迟格式化异常和堆栈，只输出一次
+        logger.exception('❌ 测试失败: %s', e)
 
 if __name__ == "__main__":
-    asyncio.run(test_final_multi_agent_fix())
\ No newline at end of file
+    # 输出写入缓冲流，结束时统一刷新，避免逐行写stdout
+    stream = open(sys.stdout.fileno(), "w", buffering=1 << 16, encoding="utf-8", closefd=False)
+    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=stream)
+    asyncio.run(test_final_multi_agent_fix())
+    stream.flush()
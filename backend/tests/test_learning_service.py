@@ -1,9 +1,11 @@
 """
 Tests for the learning service.
 """
+import asyncio
 import pytest
 import os
 import json
+from contextlib import ExitStack
 from unittest.mock import patch, AsyncMock, MagicMock, mock_open
 from datetime import datetime
 
@@ -11,6 +13,37 @@ from app.models.learning import LearningMetrics, LearningUpdate, TaskResult
 from app.services.learning_service import LearningService
 
 
+MOCK_LEARNING_METRICS = {
+    'agent_address': '0x1234567890123456789012345678901234567890',
+    'total_tasks': 12,
+    'successful_tasks': 10,
+    'failed_tasks': 2,
+    'average_score': 85.0,
+    'average_reward': 50.0,
+    'capability_growth': {
+        'analysis': 10.0,
+        'generation': 5.0,
+        'classification': 8.0
+    },
+    'confidence_factor': 70,
+    'risk_tolerance': 60,
+    'learning_rate': 0.001,
+    'exploration_rate': 0.1,
+    'last_updated': datetime.now().isoformat()
+}
+
+# State-file contents for the metrics above, serialized once at import.
+_METRICS_JSON = json.dumps({'learning_metrics': MOCK_LEARNING_METRICS})
+
+
+@pytest.fixture(scope="module")
+def event_loop():
+    """Run all tests in this module on one event loop."""
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
 @pytest.fixture
 def learning_service():
     service = LearningService()
@@ -43,160 +76,171 @@ def mock_agent_info():
 
 @pytest.fixture
 def mock_learning_metrics():
-    return {
-        'agent_address': '0x1234567890123456789012345678901234567890',
-        'total_tasks': 12,
-        'successful_tasks': 10,
-        'failed_tasks': 2,
-        'average_score': 85.0,
-        'average_reward': 50.0,
-        'capability_growth': {
-            'analysis': 10.0,
-            'generation': 5.0,
-            'classification': 8.0
-        },
-        'confidence_factor': 70,
-        'risk_tolerance': 60,
-        'learning_rate': 0.001,
-        'exploration_rate': 0.1,
-        'last_updated': datetime.now().isoformat()
+    return MOCK_LEARNING_METRICS
+
+
+@pytest.fixture(scope="module")
+def mock_integration():
+    """Learning integration mock shared by the tests in this module."""
+    integration = MagicMock()
+    integration.initial_capabilities = {
+        'analysis': 60,
+        'generation': 55,
+        'classification': 45
+    }
+    integration.get_capabilities.return_value = {
+        'analysis': 70,
+        'generation': 60,
+        'classification': 50
     }
+    return integration
+
+
+@pytest.fixture
+def learning_mocks():
+    """Install the learning and blockchain service mocks shared by the tests."""
+    with ExitStack() as stack:
+        mocks = {
+            'get_learning_metrics': stack.enter_context(patch(
+                'app.services.learning_service.learning_service.get_learning_metrics',
+                new_callable=AsyncMock
+            )),
+            'get_learning_integration': stack.enter_context(patch(
+                'app.services.learning_service.learning_service._get_learning_integration',
+                new_callable=AsyncMock
+            )),
+            'save_metrics': stack.enter_context(patch(
+                'app.services.learning_service.learning_service._save_metrics_to_state',
+                return_value=True
+            )),
+            'save_event': stack.enter_context(patch(
+                'app.services.learning_service.learning_service._save_learning_event',
+                return_value=True
+            )),
+            'load_events': stack.enter_context(patch(
+                'app.services.learning_service.learning_service._load_learning_events',
+                return_value=[]
+            )),
+            'send_transaction': stack.enter_context(patch(
+                'app.services.blockchain.blockchain_service.send_transaction',
+                new_callable=AsyncMock,
+                return_value={'status': 1, 'transaction_hash': '0xabc'}
+            ))
+        }
+        yield mocks
 
 
 @pytest.mark.asyncio
 async def test_get_learning_metrics_from_state(learning_service, mock_learning_metrics):
-    with patch('os.path.exists', return_value=True):
-        with patch('builtins.open', mock_open(read_data=json.dumps({'learning_metrics': mock_learning_metrics}))):
-            # Call the service method
-            result = await learning_service.get_learning_metrics(mock_learning_metrics['agent_address'])
-            
-            # Check the result
-            assert result is not None
-            assert result.agent_address == mock_learning_metrics['agent_address']
-            assert result.total_tasks == mock_learning_metrics['total_tasks']
-            assert result.average_score == mock_learning_metrics['average_score']
+    with ExitStack() as stack:
+        stack.enter_context(patch('os.path.exists', return_value=True))
+        stack.enter_context(patch('builtins.open', mock_open(read_data=_METRICS_JSON)))
+        
+        # Call the service method
+        result = await learning_service.get_learning_metrics(mock_learning_metrics['agent_address'])
+        
+        # Check the result
+        assert result is not None
+        assert result.agent_address == mock_learning_metrics['agent_address']
+        assert result.total_tasks == mock_learning_metrics['total_tasks']
+        assert result.average_score == mock_learning_metrics['average_score']
 
 
 @pytest.mark.asyncio
 async def test_get_learning_metrics_from_blockchain(learning_service, mock_agent_info):
-    with patch('os.path.exists', return_value=False):
-        with patch('app.services.agent_service.agent_service.get_agent', new_callable=AsyncMock) as mock_get_agent:
-            # Mock the agent service call
-            mock_get_agent.return_value = mock_agent_info
-            
-            # Call the service method
-            result = await learning_service.get_learning_metrics(mock_agent_info['address'])
-            
-            # Check the result
-            assert result is not None
-            assert result.agent_address == mock_agent_info['address']
-            assert result.total_tasks == mock_agent_info['tasks_completed'] + mock_agent_info['tasks_failed']
-            assert result.average_score == mock_agent_info['average_score']
+    with ExitStack() as stack:
+        stack.enter_context(patch('os.path.exists', return_value=False))
+        # Mock the agent service call
+        stack.enter_context(patch(
+            'app.services.agent_service.agent_service.get_agent',
+            new_callable=AsyncMock,
+            return_value=mock_agent_info
+        ))
+        
+        # Call the service method
+        result = await learning_service.get_learning_metrics(mock_agent_info['address'])
+        
+        # Check the result
+        assert result is not None
+        assert result.agent_address == mock_agent_info['address']
+        assert result.total_tasks == mock_agent_info['tasks_completed'] + mock_agent_info['tasks_failed']
+        assert result.average_score == mock_agent_info['average_score']
 
 
 @pytest.mark.asyncio
-async def test_update_learning_parameters(learning_service, mock_learning_metrics):
-    with patch('app.services.learning_service.learning_service.get_learning_metrics', new_callable=AsyncMock) as mock_get:
-        with patch('app.services.blockchain.blockchain_service.send_transaction', new_callable=AsyncMock) as mock_tx:
-            with patch('app.services.learning_service.learning_service._save_metrics_to_state', return_value=True) as mock_save:
-                # Mock the service calls
-                mock_get.return_value = LearningMetrics(**mock_learning_metrics)
-                mock_tx.return_value = {'status': 1, 'transaction_hash': '0xabc'}
-                
-                # Create update data
-                update_data = LearningUpdate(
-                    learning_rate=0.002,
-                    exploration_rate=0.15,
-                    confidence_factor=75,
-                    risk_tolerance=65
-                )
-                
-                # Call the service method
-                result = await learning_service.update_learning_parameters(
-                    mock_learning_metrics['agent_address'],
-                    update_data
-                )
-                
-                # Check the result
-                assert result is not None
-                assert result.learning_rate == 0.002
-                assert result.exploration_rate == 0.15
-                assert result.confidence_factor == 75
-                assert result.risk_tolerance == 65
+@pytest.mark.parametrize('learning_rate, exploration_rate, confidence_factor, risk_tolerance', [
+    (0.002, 0.15, 75, 65),
+    (0.0005, 0.05, 60, 40),
+])
+async def test_update_learning_parameters(learning_service, mock_learning_metrics, learning_mocks,
+                                          learning_rate, exploration_rate, confidence_factor, risk_tolerance):
+    # Mock the service calls
+    learning_mocks['get_learning_metrics'].return_value = LearningMetrics(**mock_learning_metrics)
+    
+    # Create update data
+    update_data = LearningUpdate(
+        learning_rate=learning_rate,
+        exploration_rate=exploration_rate,
+        confidence_factor=confidence_factor,
+        risk_tolerance=risk_tolerance
+    )
+    
+    # Call the service method
+    result = await learning_service.update_learning_parameters(
+        mock_learning_metrics['agent_address'],
+        update_data
+    )
+    
+    # Check the result
+    assert result is not None
+    assert result.learning_rate == learning_rate
+    assert result.exploration_rate == exploration_rate
+    assert result.confidence_factor == confidence_factor
+    assert result.risk_tolerance == risk_tolerance
 
 
 @pytest.mark.asyncio
-async def test_process_task_result(learning_service, mock_agent_info):
-    mock_integration = MagicMock()
-    mock_integration.initial_capabilities = {
-        'analysis': 60,
-        'generation': 55,
-        'classification': 45
-    }
-    mock_integration.get_capabilities.return_value = {
-        'analysis': 70,
-        'generation': 60,
-        'classification': 50
-    }
+async def test_process_task_result(learning_service, mock_agent_info, mock_integration, learning_mocks):
+    # Mock the service calls
+    learning_mocks['get_learning_integration'].return_value = mock_integration
+    
+    # Create task result data
+    task_result = TaskResult(
+        task_id='12345',
+        task_type='analysis',
+        score=85,
+        reward=100,
+        tags={
+            'analysis': 85,
+            'research': 80
+        }
+    )
     
-    with patch('app.services.learning_service.learning_service._get_learning_integration', new_callable=AsyncMock) as mock_get:
-        with patch('app.services.blockchain.blockchain_service.send_transaction', new_callable=AsyncMock) as mock_tx:
-            with patch('app.services.learning_service.learning_service._save_learning_event', return_value=True) as mock_save:
-                # Mock the service calls
-                mock_get.return_value = mock_integration
-                mock_tx.return_value = {'status': 1, 'transaction_hash': '0xabc'}
-                
-                # Create task result data
-                task_result = TaskResult(
-                    task_id='12345',
-                    task_type='analysis',
-                    score=85,
-                    reward=100,
-                    tags={
-                        'analysis': 85,
-                        'research': 80
-                    }
-                )
-                
-                # Call the service method
-                result = await learning_service.process_task_result(
-                    mock_agent_info['address'],
-                    task_result
-                )
-                
-                # Check the result
-                assert result is not None
-                assert 'updated_capabilities' in result
-                assert 'capability_changes' in result
-                assert result['updated_capabilities'] == mock_integration.get_capabilities.return_value
+    # Call the service method
+    result = await learning_service.process_task_result(
+        mock_agent_info['address'],
+        task_result
+    )
+    
+    # Check the result
+    assert result is not None
+    assert 'updated_capabilities' in result
+    assert 'capability_changes' in result
+    assert result['updated_capabilities'] == mock_integration.get_capabilities.return_value
 
 
 @pytest.mark.asyncio
-async def test_generate_learning_report(learning_service, mock_agent_info, mock_learning_metrics):
-    mock_integration = MagicMock()
-    mock_integration.get_capabilities.return_value = {
-        'analysis': 70,
-        'generation': 60,
-        'classification': 50
-    }
-    mock_integration.initial_capabilities = {
-        'analysis': 60,
-        'generation': 55,
-        'classification': 45
-    }
+async def test_generate_learning_report(learning_service, mock_agent_info, mock_learning_metrics, mock_integration,
+                                        learning_mocks):
+    # Mock the service calls
+    learning_mocks['get_learning_integration'].return_value = mock_integration
+    learning_mocks['get_learning_metrics'].return_value = LearningMetrics(**mock_learning_metrics)
+    
+    # Call the service method
+    result = await learning_service.generate_learning_report(mock_agent_info['address'])
     
-    with patch('app.services.learning_service.learning_service._get_learning_integration', new_callable=AsyncMock) as mock_get:
-        with patch('app.services.learning_service.learning_service.get_learning_metrics', new_callable=AsyncMock) as mock_get_metrics:
-            with patch('app.services.learning_service.learning_service._load_learning_events', return_value=[]) as mock_load:
-                # Mock the service calls
-                mock_get.return_value = mock_integration
-                mock_get_metrics.return_value = LearningMetrics(**mock_learning_metrics)
-                
-                # Call the service method
-                result = await learning_service.generate_learning_report(mock_agent_info['address'])
-                
-                # Check the result
-                assert result is not None
-                assert result.agent_address == mock_agent_info['address']
-                assert result.metrics.total_tasks == mock_learning_metrics['total_tasks']
-                assert result.capabilities == mock_integration.get_capabilities.return_value
\ No newline at end of file
+    # Check the result
+    assert result is not None
+    assert result.agent_address == mock_agent_info['address']
+    assert result.metrics.total_tasks == mock_learning_metrics['total_tasks']
+    assert result.capabilities == mock_integration.get_capabilities.return_value
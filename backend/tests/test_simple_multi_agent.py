@@ -3,15 +3,32 @@
 简化的多agent测试：直接修改现有任务的assigned_agents字段进行测试
 """
 
-import requests
+import asyncio
+import httpx
+import pytest
 import json
 
-def test_simple_multi_agent():
+@pytest.mark.asyncio
+async def test_simple_multi_agent():
     """简化测试：手动设置多个agents并测试执行"""
     
-    # 1. 获取一个assigned状态的任务
+    # 协作执行会调用LLM，耗时不确定，与之前一样不设超时
+    # 所有请求共用一个客户端的连接池，复用到localhost:8001的TCP连接
+    async with httpx.AsyncClient(
+        base_url="http://localhost:8001",
+        headers={"Accept": "application/json"},
+        limits=httpx.Limits(max_connections=10, max_keepalive_connections=4),
+        timeout=None
+    ) as client:
+        await run_simple_multi_agent(client)
+
+async def run_simple_multi_agent(client):
+    # 1. 获取一个assigned状态的任务，同时获取可用agents（两个请求互不依赖）
     print("1. 获取已分配的任务...")
-    response = requests.get("http://localhost:8001/tasks/", params={"status": "assigned"})
+    response, agents_response = await asyncio.gather(
+        client.get("/tasks/", params={"status": "assigned"}),
+        client.get("/agents/")
+    )
     
     if response.status_code != 200:
         print(f"❌ 获取任务失败: {response.status_code}")
@@ -31,7 +48,6 @@ def test_simple_multi_agent():
     
     # 2. 获取所有可用agents
     print("\n2. 获取可用agents...")
-    agents_response = requests.get("http://localhost:8001/agents/")
     
     if agents_response.status_code != 200:
         print(f"❌ 获取agents失败: {agents_response.status_code}")
@@ -57,7 +73,7 @@ def test_simple_multi_agent():
     # 直接测试execute-collaboration是否能处理手动设置的agents
     
     # 先检查当前任务详情
-    task_detail_response = requests.get(f"http://localhost:8001/tasks/{task_id}")
+    task_detail_response = await client.get(f"/tasks/{task_id}")
     if task_detail_response.status_code == 200:
         task_detail = task_detail_response.json()
         print(f"任务详情: assigned_agents = {task_detail.get('assigned_agents', [])}")
@@ -74,7 +90,7 @@ def test_simple_multi_agent():
             
     # 4. 直接测试execute-collaboration
     print(f"\n4. 测试协作执行...")
-    execute_response = requests.post(f"http://localhost:8001/tasks/{task_id}/execute-collaboration")
+    execute_response = await client.post(f"/tasks/{task_id}/execute-collaboration")
     
     print(f"执行状态码: {execute_response.status_code}")
     print(f"响应内容: {execute_response.text}")
@@ -88,7 +104,7 @@ def test_simple_multi_agent():
             print("\n5. 测试新的协作分配...")
             
             # 获取一个open状态的任务
-            open_tasks_response = requests.get("http://localhost:8001/tasks/", params={"status": "open"})
+            open_tasks_response = await client.get("/tasks/", params={"status": "open"})
             if open_tasks_response.status_code == 200:
                 open_tasks = open_tasks_response.json().get("tasks", [])
                 if open_tasks:
@@ -98,8 +114,8 @@ def test_simple_multi_agent():
                     print(f"找到open任务: {open_task['title']}")
                     
                     # 使用协作模式分配
-                    collab_assign_response = requests.post(
-                        f"http://localhost:8001/tasks/{open_task_id}/smart-assign",
+                    collab_assign_response = await client.post(
+                        f"/tasks/{open_task_id}/smart-assign",
                         params={"collaborative": True, "max_agents": 4}
                     )
                     
@@ -109,7 +125,7 @@ def test_simple_multi_agent():
                         print(f"分配结果: {json.dumps(assign_data, indent=2)}")
                         
                         # 检查分配后的任务状态
-                        updated_task_response = requests.get(f"http://localhost:8001/tasks/{open_task_id}")
+                        updated_task_response = await client.get(f"/tasks/{open_task_id}")
                         if updated_task_response.status_code == 200:
                             updated_task = updated_task_response.json()
                             print(f"分配后的assigned_agents: {updated_task.get('assigned_agents', [])}")
@@ -117,7 +133,7 @@ def test_simple_multi_agent():
                             # 如果有agents，测试执行
                             if updated_task.get('assigned_agents', []):
                                 print("✅ 成功设置多个agents，现在测试执行...")
-                                final_execute_response = requests.post(f"http://localhost:8001/tasks/{open_task_id}/execute-collaboration")
+                                final_execute_response = await client.post(f"/tasks/{open_task_id}/execute-collaboration")
                                 print(f"最终执行状态码: {final_execute_response.status_code}")
                                 print(f"最终执行响应: {final_execute_response.text[:500]}...")
                             else:
@@ -137,7 +153,7 @@ if __name__ == "__main__":
     print("🧪 简化多Agent测试")
     print("=" * 50)
     
-    test_simple_multi_agent()
+    asyncio.run(test_simple_multi_agent())
     
     print("\n" + "=" * 50)
     print("测试完成")
\ No newline at end of file
@@ -7,7 +7,7 @@ Test task_id fix for evaluation events
 import asyncio
 import sys
 import os
-import requests
+import httpx
 
 # 添加项目根目录到Python路径
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -18,13 +18,25 @@ from services.collaboration_db_service import collaboration_db_service
 async def test_evaluation_task_id_fix():
     print('🧪 测试评价事件task_id修复...')
     
+    # 整个测试共用一个AsyncClient，后续请求复用keep-alive连接
+    async with httpx.AsyncClient(base_url='http://localhost:8001', timeout=10) as client:
+        await run_evaluation_task_id_fix(client)
+
+async def run_evaluation_task_id_fix(client):
     try:
-        # 1. 初始化区块链连接
-        contract_service.init_web3()
-        contract_service.initialize_contracts()
+        # 1. 初始化区块链连接（同步RPC放到线程中执行，不阻塞事件循环）
+        await asyncio.to_thread(contract_service.init_web3)
+        await asyncio.to_thread(contract_service.initialize_contracts)
         
-        # 2. 获取已完成的任务
-        tasks_result = contract_service.get_all_tasks()
+        # 2. 获取已完成的任务，同时查询最近的评价事件（两者互不依赖）
+        tasks_result, recent_events = await asyncio.gather(
+            asyncio.to_thread(contract_service.get_all_tasks),
+            asyncio.to_thread(
+                collaboration_db_service.get_blockchain_events,
+                event_type='task_evaluation',
+                limit=5
+            )
+        )
         if not tasks_result.get('success'):
             print('❌ 无法获取任务列表')
             return
@@ -46,21 +58,23 @@ async def test_evaluation_task_id_fix():
         # 4. 检查当前的评价事件
         print('\n🔍 检查数据库中的评价事件...')
         
-        # 检查特定任务的评价事件
-        task_events = collaboration_db_service.get_blockchain_events(
-            event_type='task_evaluation',
-            task_id=task_id,
-            limit=10
+        # 特定任务的评价事件查询和第5步的任务历史请求都只依赖task_id，并发执行
+        task_events, history_response = await asyncio.gather(
+            asyncio.to_thread(
+                collaboration_db_service.get_blockchain_events,
+                event_type='task_evaluation',
+                task_id=task_id,
+                limit=10
+            ),
+            client.get(f'/tasks/{task_id}/history'),
+            return_exceptions=True
         )
+        if isinstance(task_events, Exception):
+            raise task_events
         
         print(f'任务 {task_id} 的评价事件: {len(task_events)} 个')
         
-        # 检查最近的所有评价事件
-        recent_events = collaboration_db_service.get_blockchain_events(
-            event_type='task_evaluation',
-            limit=5
-        )
-        
+        # 最近的所有评价事件（已在第2步获取）
         print(f'\n最近的 {len(recent_events)} 个评价事件:')
         for i, event in enumerate(recent_events):
             task_id_db = event.get('task_id')
@@ -80,7 +94,9 @@ async def test_evaluation_task_id_fix():
         # 5. 测试任务历史API
         print(f'\n📈 测试任务历史 {task_id}...')
         try:
-            history_response = requests.get(f'http://localhost:8001/tasks/{task_id}/history', timeout=10)
+            # 请求已在第4步与数据库查询并发发出，这里处理它的结果
+            if isinstance(history_response, Exception):
+                raise history_response
             if history_response.status_code == 200:
                 history_data = history_response.json()
                 history_events = history_data.get('data', {}).get('history', [])
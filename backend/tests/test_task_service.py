@@ -2,6 +2,8 @@
 Tests for the task service.
 """
 import pytest
+from dataclasses import dataclass
+from typing import Optional
 from unittest.mock import patch, AsyncMock
 from datetime import datetime
 
@@ -9,6 +11,33 @@ from app.models.task import TaskCreate, TaskUpdate, TaskAssign, TaskComplete, Ta
 from app.services.task_service import TaskService
 
 
+@pytest.fixture
+def mock_blockchain(monkeypatch):
+    """Replace the blockchain service calls used by the task service with AsyncMocks."""
+    mock = AsyncMock()
+    for name in ('call_contract', 'get_task_info', 'send_transaction'):
+        monkeypatch.setattr(
+            f'app.services.blockchain.blockchain_service.{name}',
+            getattr(mock, name)
+        )
+    return mock
+
+
+@dataclass
+class _MockTask:
+    """Minimal task record returned by the mocked get_tasks."""
+    task_id: str
+    status: TaskStatus
+    task_type: str
+    complexity: int
+    reward: int
+    created_at: datetime
+    assigned_agent: Optional[str] = None
+    assigned_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    score: Optional[int] = None
+
+
 @pytest.fixture
 def task_service():
     return TaskService()
@@ -41,32 +70,73 @@ def mock_task_info():
 
 
 @pytest.mark.asyncio
-async def test_get_tasks(task_service, mock_task_info):
-    with patch('app.services.blockchain.blockchain_service.call_contract', new_callable=AsyncMock) as mock_call:
-        with patch('app.services.blockchain.blockchain_service.get_task_info', new_callable=AsyncMock) as mock_get:
-            # Mock the blockchain service calls
-            mock_call.return_value = ['12345', '67890']
-            mock_get.return_value = mock_task_info
-            
-            # Call the service method
-            result = await task_service.get_tasks(skip=0, limit=10)
-            
-            # Check the result
-            assert result.total == 2
-            assert len(result.tasks) == 2
-            assert result.tasks[0].task_id == mock_task_info['task_id']
-            assert result.tasks[0].title == mock_task_info['title']
-            assert result.tasks[0].status == TaskStatus.AVAILABLE
+async def test_get_tasks(task_service, mock_task_info, mock_blockchain):
+    # Mock the blockchain service calls
+    mock_blockchain.call_contract.return_value = ['12345', '67890']
+    mock_blockchain.get_task_info.return_value = mock_task_info
+    
+    # Call the service method
+    result = await task_service.get_tasks(skip=0, limit=10)
+    
+    # Check the result
+    assert result.total == 2
+    assert len(result.tasks) == 2
+    assert result.tasks[0].task_id == mock_task_info['task_id']
+    assert result.tasks[0].title == mock_task_info['title']
+    assert result.tasks[0].status == TaskStatus.AVAILABLE
 
 
 @pytest.mark.asyncio
-async def test_get_task(task_service, mock_task_info):
-    with patch('app.services.blockchain.blockchain_service.get_task_info', new_callable=AsyncMock) as mock_get:
-        # Mock the blockchain service call
-        mock_get.return_value = mock_task_info
+async def test_get_tasks_by_status(task_service, mock_task_info, mock_blockchain):
+    # Mock the blockchain service calls
+    mock_blockchain.call_contract.return_value = ['13579']
+    mock_blockchain.get_task_info.return_value = {**mock_task_info, 'status': 'completed'}
+    
+    # Call the service method
+    result = await task_service.get_tasks(skip=0, limit=10, status='completed')
+    
+    # Check the status filter is applied by the contract query
+    mock_blockchain.call_contract.assert_awaited_once_with('TaskManager', 'getTasksByStatus', 4)
+    assert result.total == 1
+    assert result.tasks[0].status == TaskStatus.COMPLETED
+
+
+@pytest.mark.asyncio
+async def test_get_task(task_service, mock_task_info, mock_blockchain):
+    # Mock the blockchain service call
+    mock_blockchain.get_task_info.return_value = mock_task_info
+    
+    # Call the service method
+    result = await task_service.get_task(mock_task_info['task_id'])
+    
+    # Check the result
+    assert result is not None
+    assert result.task_id == mock_task_info['task_id']
+    assert result.title == mock_task_info['title']
+    assert result.status == TaskStatus.AVAILABLE
+
+
+@pytest.mark.asyncio
+async def test_create_task(task_service, mock_task_info, mock_blockchain):
+    with patch('uuid.uuid4') as mock_uuid:
+        # Mock the blockchain service calls
+        mock_blockchain.send_transaction.return_value = {'status': 1, 'transaction_hash': '0xabc'}
+        mock_blockchain.get_task_info.return_value = mock_task_info
+        mock_uuid.return_value = mock_task_info['task_id']
+        
+        # Create task data
+        task_data = TaskCreate(
+            title=mock_task_info['title'],
+            description=mock_task_info['description'],
+            task_type=TaskType.ANALYSIS,
+            complexity=mock_task_info['complexity'],
+            reward=mock_task_info['reward'],
+            tags=mock_task_info['tags'],
+            creator_address=mock_task_info['creator_address']
+        )
         
         # Call the service method
-        result = await task_service.get_task(mock_task_info['task_id'])
+        result = await task_service.create_task(task_data)
         
         # Check the result
         assert result is not None
@@ -76,120 +146,118 @@ async def test_get_task(task_service, mock_task_info):
 
 
 @pytest.mark.asyncio
-async def test_create_task(task_service, mock_task_info):
-    with patch('app.services.blockchain.blockchain_service.send_transaction', new_callable=AsyncMock) as mock_tx:
-        with patch('app.services.blockchain.blockchain_service.get_task_info', new_callable=AsyncMock) as mock_get:
-            with patch('uuid.uuid4') as mock_uuid:
-                # Mock the blockchain service calls
-                mock_tx.return_value = {'status': 1, 'transaction_hash': '0xabc'}
-                mock_get.return_value = mock_task_info
-                mock_uuid.return_value = mock_task_info['task_id']
-                
-                # Create task data
-                task_data = TaskCreate(
-                    title=mock_task_info['title'],
-                    description=mock_task_info['description'],
-                    task_type=TaskType.ANALYSIS,
-                    complexity=mock_task_info['complexity'],
-                    reward=mock_task_info['reward'],
-                    tags=mock_task_info['tags'],
-                    creator_address=mock_task_info['creator_address']
-                )
-                
-                # Call the service method
-                result = await task_service.create_task(task_data)
-                
-                # Check the result
-                assert result is not None
-                assert result.task_id == mock_task_info['task_id']
-                assert result.title == mock_task_info['title']
-                assert result.status == TaskStatus.AVAILABLE
+async def test_update_task(task_service, mock_task_info, mock_blockchain):
+    with patch('app.services.task_service.task_service.get_task', new_callable=AsyncMock) as mock_get_task:
+        # Mock the blockchain service calls
+        mock_blockchain.send_transaction.return_value = {'status': 1, 'transaction_hash': '0xabc'}
+        mock_blockchain.get_task_info.return_value = mock_task_info
+        
+        # Mock the current task
+        current_task = TaskStatus.AVAILABLE
+        mock_get_task.return_value.status = current_task
+        
+        # Create update data
+        update_data = TaskUpdate(
+            title='Updated Task',
+            description='This is an updated task',
+            complexity=75,
+            reward=150
+        )
+        
+        # Call the service method
+        result = await task_service.update_task(mock_task_info['task_id'], update_data)
+        
+        # Check the result
+        assert result is not None
+        assert result.task_id == mock_task_info['task_id']
 
 
 @pytest.mark.asyncio
-async def test_update_task(task_service, mock_task_info):
-    with patch('app.services.blockchain.blockchain_service.send_transaction', new_callable=AsyncMock) as mock_tx:
-        with patch('app.services.blockchain.blockchain_service.get_task_info', new_callable=AsyncMock) as mock_get:
-            with patch('app.services.task_service.task_service.get_task', new_callable=AsyncMock) as mock_get_task:
-                # Mock the blockchain service calls
-                mock_tx.return_value = {'status': 1, 'transaction_hash': '0xabc'}
-                mock_get.return_value = mock_task_info
-                
-                # Mock the current task
-                current_task = TaskStatus.AVAILABLE
-                mock_get_task.return_value.status = current_task
-                
-                # Create update data
-                update_data = TaskUpdate(
-                    title='Updated Task',
-                    description='This is an updated task',
-                    complexity=75,
-                    reward=150
-                )
-                
-                # Call the service method
-                result = await task_service.update_task(mock_task_info['task_id'], update_data)
-                
-                # Check the result
-                assert result is not None
-                assert result.task_id == mock_task_info['task_id']
+async def test_assign_task(task_service, mock_task_info, mock_blockchain):
+    # Mock the blockchain service calls
+    mock_blockchain.send_transaction.return_value = {'status': 1, 'transaction_hash': '0xabc'}
+    mock_blockchain.get_task_info.return_value = {
+        **mock_task_info,
+        'assigned_agent': '0x2345678901234567890123456789012345678901',
+        'status': 'assigned'
+    }
+    
+    # Create assign data
+    assign_data = TaskAssign(
+        agent_address='0x2345678901234567890123456789012345678901',
+        bid_amount=90
+    )
+    
+    # Call the service method
+    result = await task_service.assign_task(mock_task_info['task_id'], assign_data)
+    
+    # Check the result
+    assert result is not None
+    assert result.task_id == mock_task_info['task_id']
+    assert result.status == TaskStatus.ASSIGNED
+    assert result.assigned_agent == '0x2345678901234567890123456789012345678901'
 
 
 @pytest.mark.asyncio
-async def test_assign_task(task_service, mock_task_info):
-    with patch('app.services.blockchain.blockchain_service.send_transaction', new_callable=AsyncMock) as mock_tx:
-        with patch('app.services.blockchain.blockchain_service.get_task_info', new_callable=AsyncMock) as mock_get:
-            # Mock the blockchain service calls
-            mock_tx.return_value = {'status': 1, 'transaction_hash': '0xabc'}
-            mock_get.return_value = {
-                **mock_task_info,
-                'assigned_agent': '0x2345678901234567890123456789012345678901',
-                'status': 'assigned'
-            }
-            
-            # Create assign data
-            assign_data = TaskAssign(
-                agent_address='0x2345678901234567890123456789012345678901',
-                bid_amount=90
-            )
-            
-            # Call the service method
-            result = await task_service.assign_task(mock_task_info['task_id'], assign_data)
-            
-            # Check the result
-            assert result is not None
-            assert result.task_id == mock_task_info['task_id']
-            assert result.status == TaskStatus.ASSIGNED
-            assert result.assigned_agent == '0x2345678901234567890123456789012345678901'
+async def test_complete_task(task_service, mock_task_info, mock_blockchain):
+    # Mock the blockchain service calls
+    mock_blockchain.send_transaction.return_value = {'status': 1, 'transaction_hash': '0xabc'}
+    mock_blockchain.get_task_info.return_value = {
+        **mock_task_info,
+        'assigned_agent': '0x2345678901234567890123456789012345678901',
+        'status': 'completed',
+        'result': 'Task completed successfully',
+        'score': 85
+    }
+    
+    # Create complete data
+    complete_data = TaskComplete(
+        result='Task completed successfully'
+    )
+    
+    # Call the service method
+    result = await task_service.complete_task(mock_task_info['task_id'], complete_data)
+    
+    # Check the result
+    assert result is not None
+    assert result.task_id == mock_task_info['task_id']
+    assert result.status == TaskStatus.COMPLETED
+    assert result.result == 'Task completed successfully'
 
 
 @pytest.mark.asyncio
-async def test_complete_task(task_service, mock_task_info):
-    with patch('app.services.blockchain.blockchain_service.send_transaction', new_callable=AsyncMock) as mock_tx:
-        with patch('app.services.blockchain.blockchain_service.get_task_info', new_callable=AsyncMock) as mock_get:
-            # Mock the blockchain service calls
-            mock_tx.return_value = {'status': 1, 'transaction_hash': '0xabc'}
-            mock_get.return_value = {
-                **mock_task_info,
-                'assigned_agent': '0x2345678901234567890123456789012345678901',
-                'status': 'completed',
-                'result': 'Task completed successfully',
-                'score': 85
-            }
-            
-            # Create complete data
-            complete_data = TaskComplete(
-                result='Task completed successfully'
-            )
-            
-            # Call the service method
-            result = await task_service.complete_task(mock_task_info['task_id'], complete_data)
-            
-            # Check the result
-            assert result is not None
-            assert result.task_id == mock_task_info['task_id']
-            assert result.status == TaskStatus.COMPLETED
-            assert result.result == 'Task completed successfully'
+async def test_assign_tasks_bulk(task_service, mock_task_info, mock_blockchain):
+    # The second transaction fails, the others succeed
+    mock_blockchain.send_transaction.side_effect = [
+        {'status': 1, 'transaction_hash': '0xabc'},
+        {'status': 0, 'transaction_hash': '0xdef'},
+        {'status': 1, 'transaction_hash': '0x123'}
+    ]
+    mock_blockchain.get_task_info.return_value = {
+        **mock_task_info,
+        'assigned_agent': '0x2345678901234567890123456789012345678901',
+        'status': 'assigned'
+    }
+    
+    assign_data = TaskAssign(
+        agent_address='0x2345678901234567890123456789012345678901',
+        bid_amount=90
+    )
+    
+    # Call the service method
+    result = await task_service.assign_tasks_bulk([
+        ('12345', assign_data),
+        ('67890', assign_data),
+        ('13579', assign_data)
+    ])
+    
+    # Check the result
+    assert mock_blockchain.send_transaction.await_count == 3
+    assert mock_blockchain.get_task_info.await_count == 2
+    assert len(result) == 3
+    assert result[0].status == TaskStatus.ASSIGNED
+    assert result[1] is None
+    assert result[2].status == TaskStatus.ASSIGNED
 
 
 @pytest.mark.asyncio
@@ -198,38 +266,37 @@ async def test_get_task_stats(task_service, mock_task_info):
         # Mock the get_tasks method
         mock_get_tasks.return_value.tasks = [
             # Available task
-            type('obj', (object,), {
-                'task_id': '12345',
-                'status': TaskStatus.AVAILABLE,
-                'task_type': 'analysis',
-                'complexity': 70,
-                'reward': 100,
-                'created_at': datetime.now(),
-                'assigned_agent': None
-            }),
+            _MockTask(
+                task_id='12345',
+                status=TaskStatus.AVAILABLE,
+                task_type='analysis',
+                complexity=70,
+                reward=100,
+                created_at=datetime.now()
+            ),
             # Assigned task
-            type('obj', (object,), {
-                'task_id': '67890',
-                'status': TaskStatus.ASSIGNED,
-                'task_type': 'generation',
-                'complexity': 80,
-                'reward': 150,
-                'created_at': datetime.now(),
-                'assigned_agent': '0x2345678901234567890123456789012345678901'
-            }),
+            _MockTask(
+                task_id='67890',
+                status=TaskStatus.ASSIGNED,
+                task_type='generation',
+                complexity=80,
+                reward=150,
+                created_at=datetime.now(),
+                assigned_agent='0x2345678901234567890123456789012345678901'
+            ),
             # Completed task
-            type('obj', (object,), {
-                'task_id': '13579',
-                'status': TaskStatus.COMPLETED,
-                'task_type': 'analysis',
-                'complexity': 60,
-                'reward': 120,
-                'created_at': datetime.now(),
-                'assigned_agent': '0x2345678901234567890123456789012345678901',
-                'assigned_at': datetime.now(),
-                'completed_at': datetime.now(),
-                'score': 85
-            })
+            _MockTask(
+                task_id='13579',
+                status=TaskStatus.COMPLETED,
+                task_type='analysis',
+                complexity=60,
+                reward=120,
+                created_at=datetime.now(),
+                assigned_agent='0x2345678901234567890123456789012345678901',
+                assigned_at=datetime.now(),
+                completed_at=datetime.now(),
+                score=85
+            )
         ]
         mock_get_tasks.return_value.total = 3
         
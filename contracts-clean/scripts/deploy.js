@@ -1,6 +1,11 @@
 // 部署脚本 (Ethers v6 compatible)
+const fs = require("fs");
+const path = require("path");
 const hre = require("hardhat");
 
+// 部署地址清单，供scripts/auto_deploy.py直接读取
+const DEPLOYMENTS_FILE = path.join(__dirname, "..", "deployments.json");
+
 async function main() {
   console.log("开始部署合约...");
 
@@ -66,6 +71,19 @@ async function main() {
   console.log("MessageHub:", messageHub.target);
   console.log("Learning:", learning.target);
 
+  // 写入部署地址清单
+  const deployments = {
+    AgentRegistry: agentRegistry.target,
+    ActionLogger: actionLogger.target,
+    IncentiveEngine: incentiveEngine.target,
+    TaskManager: taskManager.target,
+    BidAuction: bidAuction.target,
+    MessageHub: messageHub.target,
+    Learning: learning.target
+  };
+  fs.writeFileSync(DEPLOYMENTS_FILE, JSON.stringify(deployments, null, 2));
+  console.log("部署地址已写入:", DEPLOYMENTS_FILE);
+
   console.log("\n✅ 所有合约已成功部署并配置!");
 }
 
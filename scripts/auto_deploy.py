@@ -4,49 +4,171 @@
 每次Ganache重启后自动部署合约并更新backend配置
 """
 
-import os
 import json
 import sys
+import hashlib
+import shutil
 import subprocess
 import time
 import re
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+import urllib3
+
 # 项目根目录
 PROJECT_ROOT = Path(__file__).parent.parent
 CONTRACTS_DIR = PROJECT_ROOT / "contracts-clean"
+# deploy.js写入的部署地址清单
+DEPLOYMENTS_FILE = CONTRACTS_DIR / "deployments.json"
+# 清单对应的合约源码哈希，源码变化后不再复用旧部署
+DEPLOYMENTS_HASH_FILE = CONTRACTS_DIR / "deployments.hash"
 BACKEND_DIR = PROJECT_ROOT / "backend"
 ABI_DIR = BACKEND_DIR / "contracts" / "abi"
+# hardhat编译产物目录（见contracts-clean/hardhat.config.js的paths配置）
+ARTIFACTS_DIR = PROJECT_ROOT / "artifacts-clean"
+HARDHAT_CACHE_DIR = PROJECT_ROOT / "cache-clean"
+# 按合约源码哈希保存的编译产物缓存
+BUILD_CACHE_DIR = PROJECT_ROOT / ".deploy_cache"
+BACKEND_URL = "http://127.0.0.1:8001"
+GANACHE_URL = "http://localhost:8545"
+
+# 就绪轮询和RPC探测共用的连接池，避免每次探测重新建立连接
+_POOL = urllib3.PoolManager(num_pools=2, maxsize=2, retries=False)
+
+def _wait_until(fn, timeout=10, interval=0.05):
+    """轮询fn直到返回真值或超时，fn抛出的异常视为尚未就绪"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if fn():
+                return True
+        except Exception:
+            pass
+        time.sleep(interval)
+    return False
+
+def _rpc(method, params):
+    """向Ganache发送JSON-RPC请求并返回result字段"""
+    payload = json.dumps({"jsonrpc": "2.0", "method": method, "params": params, "id": 1}).encode()
+    response = _POOL.request(
+        "POST",
+        GANACHE_URL,
+        body=payload,
+        headers={"Content-Type": "application/json"},
+        timeout=3
+    )
+    return json.loads(response.data).get("result")
 
 def check_ganache_running():
     """检查Ganache是否运行"""
     try:
-        import subprocess
-        # 使用curl检查Ganache是否响应
+        return _rpc("eth_chainId", []) is not None
+    except Exception:
+        return False
+
+def check_backend_running():
+    """检查backend是否响应"""
+    try:
+        return _POOL.request("GET", f"{BACKEND_URL}/", timeout=0.2).status == 200
+    except Exception:
+        return False
+
+def contracts_hash():
+    """计算所有.sol源码和hardhat配置的哈希，作为编译产物缓存的键"""
+    digest = hashlib.sha256()
+    sources = sorted((CONTRACTS_DIR / "core").rglob("*.sol"))
+    for path in sources + [CONTRACTS_DIR / "hardhat.config.js"]:
+        digest.update(path.relative_to(CONTRACTS_DIR).as_posix().encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+def restore_build_cache(build_hash):
+    """源码未变化时从缓存恢复artifacts和cache目录，返回是否命中"""
+    cached = BUILD_CACHE_DIR / build_hash
+    if not (cached / "artifacts").is_dir() or not (cached / "cache").is_dir():
+        return False
+    
+    shutil.copytree(cached / "artifacts", ARTIFACTS_DIR, dirs_exist_ok=True)
+    shutil.copytree(cached / "cache", HARDHAT_CACHE_DIR, dirs_exist_ok=True)
+    return True
+
+def save_build_cache(build_hash):
+    """把本次编译产生的artifacts和cache目录保存到缓存"""
+    cached = BUILD_CACHE_DIR / build_hash
+    try:
+        shutil.copytree(ARTIFACTS_DIR, cached / "artifacts", dirs_exist_ok=True)
+        shutil.copytree(HARDHAT_CACHE_DIR, cached / "cache", dirs_exist_ok=True)
+    except Exception as e:
+        # 缓存只影响下次部署的速度，保存失败不影响本次部署
+        print(f"⚠️  保存编译缓存失败: {str(e)}")
+
+def compile_contracts():
+    """编译合约，源码和配置没有变化时直接复用缓存的编译产物"""
+    build_hash = contracts_hash()
+    if restore_build_cache(build_hash):
+        print("♻️  合约未变化，复用缓存的编译产物")
+        return True
+    
+    print("🔨 编译智能合约...")
+    try:
+        # 编译不需要连接区块链，可以和Ganache检查并行执行
+        # 编译日志直接丢弃，只保留stderr用于报错
         result = subprocess.run(
-            ["curl", "-s", "-X", "POST", "-H", "Content-Type: application/json", 
-             "--data", '{"jsonrpc":"2.0","method":"eth_chainId","params":[],"id":1}',
-             "http://localhost:8545"],
-            capture_output=True,
+            ["npx", "hardhat", "compile"],
+            cwd=CONTRACTS_DIR,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
             text=True,
-            timeout=5
+            timeout=120
         )
-        return result.returncode == 0 and "result" in result.stdout
-    except:
+    except subprocess.TimeoutExpired:
+        print("❌ 编译超时")
+        return False
+    
+    if result.returncode != 0:
+        print(f"❌ 合约编译失败: {result.stderr}")
         return False
+    
+    save_build_cache(build_hash)
+    return True
+
+def load_live_deployments():
+    """上次部署的合约源码未变且仍在链上时返回其地址映射，否则返回None"""
+    try:
+        if DEPLOYMENTS_HASH_FILE.read_text().strip() != contracts_hash():
+            return None
+        
+        with open(DEPLOYMENTS_FILE, 'r', encoding='utf-8') as f:
+            addresses = json.load(f)
+        
+        # Ganache重启后地址上没有代码，需要重新部署
+        for address in addresses.values():
+            if len(_rpc("eth_getCode", [address, "latest"]) or "0x") <= 2:
+                return None
+        return addresses or None
+    except Exception:
+        return None
 
-def deploy_contracts():
-    """部署所有合约并返回地址映射"""
+def deploy_contracts(compiled=False):
+    """部署所有合约并返回地址映射，compiled为True时跳过编译直接部署"""
+    if not compiled and not compile_contracts():
+        return None
+    
     print("🚀 开始部署智能合约...")
     
-    # 切换到contracts目录
-    os.chdir(CONTRACTS_DIR)
+    # 删除上次的清单，避免部署失败时读到旧地址
+    DEPLOYMENTS_FILE.unlink(missing_ok=True)
+    DEPLOYMENTS_HASH_FILE.unlink(missing_ok=True)
     
     try:
-        # 运行部署脚本
+        # 在contracts目录运行部署脚本（合约已编译，只执行部署）
+        # 地址从清单文件读取，标准输出不再需要缓存，只保留stderr用于报错
         result = subprocess.run(
-            ["npx", "hardhat", "run", "scripts/deploy.js", "--network", "ganache"],
-            capture_output=True,
+            ["npx", "hardhat", "run", "scripts/deploy.js", "--network", "ganache", "--no-compile"],
+            cwd=CONTRACTS_DIR,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
             text=True,
             timeout=120
         )
@@ -55,30 +177,21 @@ def deploy_contracts():
             print(f"❌ 合约部署失败: {result.stderr}")
             return None
         
-        # 解析部署输出获取合约地址
-        output = result.stdout
-        print(f"✅ 部署输出:\n{output}")
-        
-        # 提取合约地址
-        addresses = {}
-        lines = output.split('\n')
-        
-        for line in lines:
-            if "已部署到:" in line or "deployed to:" in line.lower():
-                # 匹配格式如: "AgentRegistry 已部署到: 0x..."
-                parts = line.strip().split()
-                if len(parts) >= 3:
-                    contract_name = parts[0].rstrip(':：')
-                    address = parts[-1]
-                    if address.startswith('0x') and len(address) == 42:
-                        addresses[contract_name] = address
+        # 读取deploy.js写入的部署地址清单
+        try:
+            with open(DEPLOYMENTS_FILE, 'r', encoding='utf-8') as f:
+                addresses = json.load(f)
+        except (OSError, ValueError):
+            addresses = None
         
         if not addresses:
-            print("⚠️  未能从输出中解析到合约地址，尝试备用方法...")
+            print("⚠️  未能读取部署地址清单，尝试备用方法...")
             # 备用方法：从日志文件解析
             return parse_addresses_from_logs()
         
-        print(f"📋 解析到的合约地址: {addresses}")
+        print(f"📋 部署的合约地址: {addresses}")
+        # 记录清单对应的源码哈希，供下次判断能否复用
+        DEPLOYMENTS_HASH_FILE.write_text(contracts_hash())
         return addresses
         
     except subprocess.TimeoutExpired:
@@ -199,12 +312,10 @@ def init_contract_data():
     try:
         print("📊 开始初始化合约数据...")
         
-        # 切换到backend目录
-        os.chdir(BACKEND_DIR)
-        
-        # 运行数据初始化脚本
+        # 在backend目录运行数据初始化脚本
         result = subprocess.run(
             [sys.executable, "scripts/init_contract_data.py"],
+            cwd=BACKEND_DIR,
             capture_output=True,
             text=True,
             timeout=60
@@ -228,19 +339,22 @@ def restart_backend():
         print("🔄 重启backend服务...")
         
         # 杀死现有进程
-        subprocess.run(["pkill", "-f", "uvicorn"], capture_output=True)
-        subprocess.run(["pkill", "-f", "python.*backend"], capture_output=True)
+        subprocess.run(["pkill", "-f", "uvicorn"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        subprocess.run(["pkill", "-f", "python.*backend"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
         
-        time.sleep(2)
+        # 等待旧进程释放端口，不再固定等待2秒
+        _wait_until(lambda: not check_backend_running(), timeout=2)
         
         # 启动新的backend服务
-        os.chdir(PROJECT_ROOT)
         subprocess.Popen([
             sys.executable, "-c", 
             "import sys; sys.path.append('.'); from backend.main import app; import uvicorn; uvicorn.run(app, host='127.0.0.1', port=8001)"
-        ], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        ], cwd=PROJECT_ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
         
-        time.sleep(3)
+        # 服务一响应就返回，不再固定等待3秒
+        if not _wait_until(check_backend_running, timeout=30):
+            print("⚠️  Backend服务在30秒内未响应，请稍后检查")
+            return True
         print("✅ Backend服务已重启")
         return True
         
@@ -253,42 +367,54 @@ def main():
     print("🔧 智能合约自动化部署工具")
     print("=" * 50)
     
-    # 检查Ganache是否运行
-    if not check_ganache_running():
+    # 合约编译不依赖Ganache，放到后台线程，与等待Ganache就绪同时进行
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        compile_future = executor.submit(compile_contracts)
+        # 检查Ganache是否运行（刚启动的Ganache给几秒时间就绪）
+        ganache_running = _wait_until(check_ganache_running, timeout=10, interval=0.5)
+        compiled = compile_future.result()
+    
+    if not ganache_running:
         print("❌ Ganache未运行，请先启动Ganache")
         sys.exit(1)
     
     print("✅ Ganache正在运行")
     
-    # 1. 部署合约
-    addresses = deploy_contracts()
-    if not addresses:
-        print("❌ 合约部署失败")
-        sys.exit(1)
-    
-    # 2. 复制ABI文件
-    if not copy_abi_files():
-        print("❌ ABI文件复制失败")
+    if not compiled:
+        print("❌ 合约编译失败")
         sys.exit(1)
     
-    # 3. 更新contract_service配置
-    if not update_contract_service(addresses):
-        print("❌ 更新合约服务配置失败")
+    # 1. 部署合约（上次部署的合约仍在链上时直接复用）
+    addresses = load_live_deployments()
+    reused = addresses is not None
+    if reused:
+        print("♻️  上次部署的合约仍在链上，跳过部署")
+    else:
+        addresses = deploy_contracts(compiled=True)
+    if not addresses:
+        print("❌ 合约部署失败")
         sys.exit(1)
     
-    # 4. 初始化合约数据
-    if not init_contract_data():
-        print("⚠️  合约数据初始化失败，但继续执行...")
+    # 2-5. 部署后的各步骤：(步骤名称, 执行函数, 失败时是否中止)
+    steps = [
+        ("ABI文件复制", copy_abi_files, True),
+        ("更新合约服务配置", lambda: update_contract_service(addresses), True),
+        # 复用的合约已经初始化过数据
+        ("合约数据初始化", None if reused else init_contract_data, False),
+        ("Backend重启", restart_backend, True),
+    ]
     
-    # 5. 重启backend服务
-    if not restart_backend():
-        print("❌ Backend重启失败")
-        sys.exit(1)
+    for name, step, required in steps:
+        if step is None or step():
+            continue
+        if required:
+            print(f"❌ {name}失败")
+            sys.exit(1)
+        print(f"⚠️  {name}失败，但继续执行...")
     
     print("\n🎉 自动化部署完成！")
-    print("📋 合约地址:")
-    for name, addr in addresses.items():
-        print(f"   {name}: {addr}")
+    # 地址列表拼成一段文本一次输出
+    print("📋 合约地址:\n" + "\n".join(f"   {name}: {addr}" for name, addr in addresses.items()))
     
     print(f"\n🌐 Backend服务: http://localhost:8001")
     print("🔗 可以开始使用区块链数据了！")
@@ -12,12 +12,19 @@ import sys
 from pathlib import Path
 
 PROJECT_ROOT = Path(__file__).parent.parent
+GANACHE_URL = "http://localhost:8545"
+# 自动部署脚本的输出写入日志文件，不在内存中缓存
+DEPLOY_LOG = PROJECT_ROOT / "auto_deploy.log"
+
+# 监控循环会反复调用RPC，共用一个keep-alive会话，避免每次请求重新建立TCP连接
+_session = requests.Session()
+_session.mount("http://", requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=16))
 
 def check_ganache_connection():
     """检查Ganache连接状态"""
     try:
-        response = requests.post(
-            "http://localhost:8545",
+        response = _session.post(
+            GANACHE_URL,
             json={"jsonrpc": "2.0", "method": "eth_chainId", "params": [], "id": 1},
             timeout=3
         )
@@ -28,8 +35,8 @@ def check_ganache_connection():
 def get_block_number():
     """获取当前区块号"""
     try:
-        response = requests.post(
-            "http://localhost:8545",
+        response = _session.post(
+            GANACHE_URL,
             json={"jsonrpc": "2.0", "method": "eth_blockNumber", "params": [], "id": 1},
             timeout=3
         )
@@ -43,8 +50,8 @@ def get_block_number():
 def get_deployed_contracts():
     """获取已部署的合约列表"""
     try:
-        response = requests.post(
-            "http://localhost:8545",
+        response = _session.post(
+            GANACHE_URL,
             json={"jsonrpc": "2.0", "method": "eth_getCode", "params": ["0xe78A0F7E598Cc8b0Bb87894B0F60dD2a88d6a8Ab", "latest"], "id": 1},
             timeout=3
         )
@@ -62,19 +69,22 @@ def auto_redeploy():
     
     try:
         # 运行自动部署脚本
-        result = subprocess.run(
-            [sys.executable, str(PROJECT_ROOT / "scripts" / "auto_deploy.py")],
-            cwd=PROJECT_ROOT,
-            capture_output=True,
-            text=True,
-            timeout=300
-        )
+        with open(DEPLOY_LOG, 'wb') as log_file:
+            result = subprocess.run(
+                [sys.executable, str(PROJECT_ROOT / "scripts" / "auto_deploy.py")],
+                cwd=PROJECT_ROOT,
+                stdout=log_file,
+                stderr=subprocess.STDOUT,
+                timeout=300
+            )
         
         if result.returncode == 0:
             print("✅ 自动重新部署成功！")
             return True
         else:
-            print(f"❌ 自动重新部署失败: {result.stderr}")
+            # 失败时只读取日志末尾用于提示
+            tail = DEPLOY_LOG.read_text(encoding='utf-8', errors='replace')[-2000:]
+            print(f"❌ 自动重新部署失败 (完整日志: {DEPLOY_LOG}):\n{tail}")
             return False
             
     except Exception as e: